@@ -1,9 +1,14 @@
 import pandas as pd
+import numpy as np
 import json
+from dataclasses import dataclass
 from pathlib import Path
 
-def load_project_mappings(path=r"C:\Codes\Personal_Task_Recommender\data\project_mappings.json"):
-    """Load project_id -> project_name mappings"""
+from path_manager import paths
+
+def load_project_mappings(path=None):
+    """Load project_id -> project_name mappings (default: data/project_mappings.json, kept current by toggl_sync)"""
+    path = path or paths.data_dir / "project_mappings.json"
     try:
         with open(path, "r") as f:
             return json.load(f)
@@ -11,24 +16,28 @@ def load_project_mappings(path=r"C:\Codes\Personal_Task_Recommender\data\project
         print(f"Warning: {path} not found. Using project_id as project name.")
         return {}
     
-def load_entries(path=None):
-
-    if not path: 
+def list_processed_files(path=None):
+    """Processed entry CSVs (task_events.csv is model output, not entries)."""
+    if not path:
         project_root = Path(__file__).parent.parent
-        processed_dir = project_root / "data" / "processed"
-        
-        csv_files = [f for f in processed_dir.glob("*.csv") if f.name != "task_events.csv"]
-   
+        path = project_root / "data" / "processed"
+    processed_dir = Path(path)
+
+    csv_files = [f for f in processed_dir.glob("*.csv") if f.name != "task_events.csv"]
 
-        if not csv_files: 
-            raise FileNotFoundError(f"No CSV files found in {processed_dir}")
-        
-        
+    if not csv_files: 
+        raise FileNotFoundError(f"No CSV files found in {processed_dir}")
+    return csv_files
 
+def read_entries(csv_files):
+    """Read processed CSVs as-is (no cleanup)."""
     df_list   = [pd.read_csv(f, parse_dates=["start"],index_col=False,na_values=[],na_filter=False) for f in csv_files] # stop isn't needed for analysis as we already have duration.
     # parse_dates is important because it's converting the string object into datetime.
 
-    df=  pd.concat(df_list, ignore_index=True) # We are using concat coz multiple dataframes coz different files collectively put together. Another way to do is to first gather all the entires in one file and read it once. 
+    return pd.concat(df_list, ignore_index=True) # We are using concat coz multiple dataframes coz different files collectively put together. Another way to do is to first gather all the entires in one file and read it once. 
+
+def prepare_entries(df, project_mappings=None):
+    """Dedupe, sort, attach project names and apply the entry schema. Used for the full load and for live deltas."""
     df.drop_duplicates(subset="id", inplace=True) 
     df.sort_values("start", inplace=True) # if we don't add inplace, then df will remain unchanged, as the new sorted object isn't being assigned to any variable, hence not manipulated. 
 
@@ -36,34 +45,293 @@ def load_entries(path=None):
         print("!!! duration_h column missing - something's wrong")
         return df
     
-    project_mappings = load_project_mappings()
+    if project_mappings is None:
+        project_mappings = load_project_mappings()
 
-     # Fix: Remove .0 suffix from project_ids. This happened when pandas read NaN values and makes the whole column float.  
-    df["project_id"] = df["project_id"].astype(str).str.replace('.0', '', regex=False)
-    # making sure that project id is a string.
-    
-    df["project"] = df["project_id"].map(project_mappings)
+    # project_id comes back as float when the column has gaps (NaN) -> nullable int, not a "123.0" string
+    df["project_id"] = pd.to_numeric(df["project_id"], errors="coerce").astype("Int64")
+    project_key = df["project_id"].astype(str)
+
+    df["project"] = project_key.map(project_mappings)
 
     # Better fallback - use project_id if mapping fails
-    df["project"] = df["project"].fillna("Project_" + df["project_id"])
+    df["project"] = df["project"].fillna("Project_" + project_key)
+    return apply_entry_schema(df)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Backend: "pandas" (eager frames, the default) or "polars" (lazy scans, see
+# polars_backend.py), from configs/config.json analytics_backend. load_entries()
+# returns the backend's frame; total_time / time_per_day / time_by_project accept
+# either and answer in kind.
+BACKENDS = ("pandas", "polars")
+
+def analytics_backend(backend=None):
+    from config_registry import registry
+    backend = backend or registry.get("config").get("analytics_backend", "pandas")
+    if backend not in BACKENDS:
+        raise ValueError(f"analytics backend must be one of {BACKENDS}, got {backend!r}")
+    if backend == "polars":
+        try:
+            import polars_backend  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("analytics_backend 'polars' needs the polars package (pip install polars)") from e
+    return backend
+
+def is_polars(df):
+    """pl.DataFrame / pl.LazyFrame (checked without importing polars)"""
+    return type(df).__module__.split(".")[0] == "polars"
+
+def load_entries(path=None, validate=True, backend=None):
+    """Processed entries: a pandas frame, or a Polars LazyFrame with backend "polars" (nothing read yet)"""
+    if analytics_backend(backend) == "polars":
+        # validation runs inside the lazy query (polars_backend.resolve_overlaps): same rows
+        # dropped / clipped as entry_validation, but nothing is quarantined or reported
+        from config_registry import registry
+        from polars_backend import scan_entries
+        policy = registry.get("config").get("overlap_policy", "clip") if validate else "keep"
+        return scan_entries(list_processed_files(path), load_project_mappings(), overlap_policy=policy)
+
+    df = prepare_entries(read_entries(list_processed_files(path)))
+    if "duration_h" not in df.columns:
+        return df
+
+    if validate:
+        # running / invalid rows quarantined, overlapping timers resolved (config.json overlap_policy)
+        from entry_validation import validate_entries, format_summary
+        result = validate_entries(df)
+        print(f"!!! Validation: {format_summary(result.summary)}")
+        df = result.entries
     
-    print(f"!!! Loaded {len(df)} entries with {df['duration_h'].sum():.1f} total hours")
+    print(f"!!! Loaded {len(df)} entries with {df['duration_h'].sum():.1f} total hours "
+          f"({df.memory_usage(deep=True).sum() / 2**20:.1f} MB)")
+    return df
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Compact in-memory schema for the entries frame. Repeated strings are stored as
+# categoricals (each distinct value once + small integer codes), hours as float32
+# and calendar fields as small ints. `date` / `week_start` are tz-naive local
+# midnights (datetime64), so compare them with pd.Timestamp, not datetime.date.
+ENTRY_DTYPES = {
+    "id":          "int64",
+    "duration":    "int32",
+    "duration_h":  "float32",
+    "project_id":  "Int64",
+    "weekday":     "int8",     # Monday = 0
+    "iso_year":    "int16",
+    "iso_week":    "int16",
+}
+CATEGORY_COLS = ["project", "description", "tags", "tag_string", "category"]
+
+
+def local_dates(start):
+    """Local calendar day of each start timestamp, as tz-naive datetime64"""
+    start = pd.to_datetime(start)
+    if start.dt.tz is not None:
+        start = start.dt.tz_localize(None)  # drops the offset, keeps local wall time
+    return start.dt.normalize()
+
+def apply_entry_schema(df):
+    """Cast an entries frame to ENTRY_DTYPES (in place) and derive the calendar columns from `start`"""
+    if "stop" in df.columns:
+        df["stop"] = pd.to_datetime(df["stop"], errors="coerce", utc=True).dt.tz_convert(df["start"].dt.tz)
+
+    df["date"] = local_dates(df["start"])
+    df["week_start"] = df["date"] - pd.to_timedelta(df["date"].dt.weekday, unit="D")
+    df["weekday"] = df["start"].dt.weekday
+    iso = df["start"].dt.isocalendar()
+    df["iso_year"] = iso["year"]
+    df["iso_week"] = iso["week"]
+
+    for col, dtype in ENTRY_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    for col in CATEGORY_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
     return df
 
+def align_categories(left, right):
+    """Give both frames the same categories per categorical column, so pd.concat keeps them categorical"""
+    for col in CATEGORY_COLS:
+        if col not in left.columns or col not in right.columns:
+            continue
+        if not isinstance(left[col].dtype, pd.CategoricalDtype):
+            continue
+        right_col = right[col].astype("category")
+        missing = right_col.cat.categories.difference(left[col].cat.categories)
+        if len(missing):
+            left[col] = left[col].cat.add_categories(missing)
+        right[col] = right_col.cat.set_categories(left[col].cat.categories)
+    return left, right
+
+def memory_report(df):
+    """Resident size per column (deep, i.e. including string payloads), largest first"""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "MB":    usage / 2**20,
+        "bytes/row": usage / max(len(df), 1),
+    }).sort_values("MB", ascending=False)
+    report.loc["TOTAL"] = ["", report["MB"].sum(), report["bytes/row"].sum()]
+    return report
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Tags. process_file keeps them as "a;b" strings (tag_string); TagIndex turns that
+# into a tag dictionary + an (entry_id, tag_id) bridge once, so grouping and
+# filtering by tag are integer operations instead of string splits per row.
+
+def split_tags(tag_string):
+    """'a;b' → ['a', 'b'] (blanks and repeats dropped)"""
+    return list(dict.fromkeys(t for t in str(tag_string).split(";") if t.strip())) if isinstance(tag_string, str) else []
+
+@dataclass
+class TagIndex:
+    tags: pd.Index           # tag_id → tag name
+    bridge: pd.DataFrame     # entry_id (int64), tag_id (int32); one row per tag on an entry
+
+    @classmethod
+    def from_frame(cls, df):
+        """Built from the distinct tag_string values only; rows are expanded through the category codes"""
+        if df.empty or "tag_string" not in df.columns:
+            return cls(pd.Index([], dtype=object), pd.DataFrame({"entry_id": np.array([], dtype="int64"),
+                                                                  "tag_id": np.array([], dtype="int32")}))
+        tag_strings = df["tag_string"].astype("category")
+        split = [split_tags(s) for s in tag_strings.cat.categories]
+        tags = pd.Index(sorted({t for names in split for t in names}), dtype=object)
+
+        lengths = np.array([len(names) for names in split], dtype=np.int64)
+        flat = tags.get_indexer([t for names in split for t in names]).astype("int32")
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        codes = tag_strings.cat.codes.to_numpy()
+        rows = np.flatnonzero(codes >= 0)
+        codes = codes[rows]
+        counts = lengths[codes]
+        # position of every (row, k-th tag) in `flat`
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        tag_ids = flat[np.repeat(offsets[codes], counts) + within]
+
+        bridge = pd.DataFrame({
+            "entry_id": df["id"].to_numpy(dtype="int64")[np.repeat(rows, counts)],
+            "tag_id":   tag_ids,
+        })
+        return cls(tags, bridge)
+
+    def tag_ids(self, names):
+        ids = self.tags.get_indexer(list(names))
+        return ids[ids >= 0]
+
+    def entry_ids(self, names, match="any"):
+        """ids of entries carrying any (or all, match="all") of the named tags"""
+        wanted = self.tag_ids(names)
+        hits = self.bridge.loc[self.bridge["tag_id"].isin(wanted), "entry_id"]
+        if match == "all":
+            counts = hits.value_counts()
+            return counts.index[counts == len(set(names))].to_numpy()
+        return hits.unique()
+
+def filter_by_tags(df, names, tag_index=None, match="any"):
+    """Entries carrying any / all of the named tags"""
+    tag_index = tag_index or TagIndex.from_frame(df)
+    return df[df["id"].isin(tag_index.entry_ids(names, match))]
+
+def time_by_tag(df, tag_index=None):
+    """ tag and hours. An entry with several tags counts towards each; untagged entries are left out.
+    tag_index may be built on a larger frame (e.g. all entries) than df. """
+    tag_index = tag_index or TagIndex.from_frame(df)
+    bridge = tag_index.bridge
+    rows = pd.Index(df["id"]).get_indexer(bridge["entry_id"])
+    found = rows >= 0
+    hours = np.bincount(bridge["tag_id"].to_numpy()[found],
+                        weights=df["duration_h"].to_numpy(dtype=float)[rows[found]],
+                        minlength=len(tag_index.tags))
+    by_tag = pd.DataFrame({"tag": tag_index.tags.astype(str), "hours": hours})
+    return by_tag[by_tag["hours"] > 0].sort_values("hours", ascending=False, ignore_index=True)
+
 def total_time(df):
+    if is_polars(df):
+        from polars_backend import total_time as total_time_pl
+        return total_time_pl(df)
     return df['duration_h'].sum()
 
 def time_per_day(df):
     """ returns a dataframe with two columns: date and time. """
+    if is_polars(df):
+        from polars_backend import time_per_day as time_per_day_pl
+        return time_per_day_pl(df)
 
-    return (df.groupby(df["date"])["duration_h"]
+    daily = (df.groupby(df["date"])["duration_h"]
               .sum()
+              .astype(float)
               .reset_index()# Reset index converts series to a dataframe with index column now being original name which is here "date".
-              .rename(columns= {"duration_h":"hours"})) 
+              .rename(columns= {"duration_h":"hours"}))
+    daily["date"] = pd.to_datetime(daily["date"]).dt.date  # plain dates label the chart axes as YYYY-MM-DD
+    return daily
 
 def time_by_project(df):
-    return (df.groupby("project")["duration_h"]  
+    if is_polars(df):
+        from polars_backend import time_by_project as time_by_project_pl
+        return time_by_project_pl(df)
+    return (df.groupby("project", observed=True)["duration_h"]  
               .sum()
+              .astype(float)
               .reset_index()
               .rename(columns={"duration_h": "hours"})
               .sort_values("hours", ascending=False))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# SQL equivalents (ENTRIES_DB_FILE). The aggregation runs inside SQLite on the
+# indexed entries table, so only the small result frame comes back to pandas.
+# Filters: start_date / end_date (inclusive local dates), project_ids, categories, tags.
+
+def _entries_db(db=None):
+    from entries_db import open_default_db
+    db = db or open_default_db()
+    if db is None:
+        raise RuntimeError("ENTRIES_DB_FILE is not configured")
+    return db
+
+def total_time_db(db=None, **filters):
+    from entries_db import where_clause
+    where, params = where_clause(**filters)
+    result = _entries_db(db).query(f"SELECT COALESCE(SUM(duration_h), 0) AS hours FROM entries{where}", params)
+    return float(result["hours"].iloc[0])
+
+def time_per_day_db(db=None, **filters):
+    """ Same columns as time_per_day: date and hours. """
+    from entries_db import where_clause
+    where, params = where_clause(**filters)
+    daily = _entries_db(db).query(
+        f"SELECT date, SUM(duration_h) AS hours FROM entries{where} GROUP BY date ORDER BY date", params
+    )
+    daily["date"] = pd.to_datetime(daily["date"]).dt.date
+    return daily
+
+def time_by_project_db(db=None, **filters):
+    """ Same columns as time_by_project: project and hours. """
+    from entries_db import where_clause
+    where, params = where_clause(**filters)
+    return _entries_db(db).query(
+        f"SELECT project, SUM(duration_h) AS hours FROM entries{where} "
+        f"GROUP BY project ORDER BY hours DESC", params
+    )
+
+def time_by_tag_db(db=None, **filters):
+    """ Same columns as time_by_tag: tag and hours (joins the entry_tags bridge). """
+    from entries_db import where_clause
+    where, params = where_clause(**filters)
+    return _entries_db(db).query(
+        f"SELECT t.name AS tag, SUM(duration_h) AS hours FROM entry_tags et "
+        f"JOIN tags t ON t.tag_id = et.tag_id JOIN entries ON entries.id = et.entry_id{where} "
+        f"GROUP BY t.tag_id ORDER BY hours DESC", params
+    )
+
+def time_per_hour_db(db=None, **filters):
+    """ Hours tracked per hour of day (0-23), by entry start. """
+    from entries_db import where_clause
+    where, params = where_clause(**filters)
+    return _entries_db(db).query(
+        f"SELECT hour, SUM(duration_h) AS hours FROM entries{where} GROUP BY hour ORDER BY hour", params
+    )
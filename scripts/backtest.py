@@ -0,0 +1,196 @@
+""" Replay history and score how well RecommendationEngine rankings predicted the task actually started """
+
+import time
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from analytics import local_dates
+from recommendation_engine import PRIORITY_MULTIPLIERS, goal_score, performance_score
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Everything the engine's score depends on is rebuilt from prefix sums over the
+# time-sorted entries, for all decision points at once, and scored with the
+# engine's own helpers. Only the weights are applied per evaluation, so sweeping
+# them reuses the same arrays.
+
+
+@dataclass
+class BacktestData:
+    decision_times: pd.Series   # episode starts (one decision point each)
+    task_names: List[str]       # catalogue order = engine tie-break order
+    target: np.ndarray          # (n,) index of the task actually started
+    perf: np.ndarray            # (n,) performance score at each decision point
+    goal: np.ndarray            # (n, tasks) goal score of each task's category
+    difficulty_adj: np.ndarray  # (n, tasks)
+    prob: np.ndarray            # (n, tasks) P(completed), ones without a two-class model
+
+
+def _day_numbers(start: pd.Series) -> np.ndarray:
+    """Local calendar day of each timestamp as days since 1970-01-01"""
+    return ((local_dates(start) - pd.Timestamp("1970-01-01")) // pd.Timedelta(days=1)).to_numpy()
+
+
+def _performance_scores(engine, day, hours, ends, day_t):
+    """calculate_performance_score at every decision point (entries before it only)"""
+    window = engine.performance_window_days
+    cum_hours = np.concatenate([[0.0], np.cumsum(hours)])
+    first_of_day = np.concatenate([[True], day[1:] != day[:-1]])
+    cum_days = np.concatenate([[0], np.cumsum(first_of_day)])
+
+    starts = np.searchsorted(day, day_t - (window - 1), side="left")
+    window_hours = cum_hours[ends] - cum_hours[starts]
+    # distinct days with entries in [start, end): each day counts at its first entry,
+    # and the window always starts on one
+    window_days = cum_days[ends] - cum_days[starts]
+
+    avg = np.divide(window_hours, window_days, out=np.zeros_like(window_hours), where=window_days > 0)
+    return np.where(window_days > 0, performance_score(avg / engine.daily_target_hours), 0.5)
+
+
+def _goal_scores(engine, day, hours, category, ends, day_t, categories):
+    """calculate_weekly_goal_score at every decision point: (n, categories)"""
+    weekly_goals = engine.goal_tracker.weekly_goals
+    onehot = (category[:, None] == np.asarray(categories, dtype=object)[None, :]) * hours[:, None]
+    cum_cat = np.vstack([np.zeros(len(categories)), np.cumsum(onehot, axis=0)])
+
+    # Monday of the decision point's week (day numbers count from Thursday 1970-01-01)
+    week_start = day_t - (day_t + 3) % 7
+    starts = np.searchsorted(day, week_start, side="left")
+    done = np.round(cum_cat[ends] - cum_cat[starts], 2)
+
+    scores = np.full(done.shape, 0.5)
+    for j, cat in enumerate(categories):
+        goal = weekly_goals.get(cat)
+        if goal is None:
+            continue
+        scores[:, j] = goal_score(done[:, j] / goal["target_hours"], PRIORITY_MULTIPLIERS.get(goal["priority"], 1.0))
+    return scores
+
+
+def prepare_backtest(engine, entries: pd.DataFrame, episodes: pd.DataFrame = None) -> BacktestData:
+    """
+    Point-in-time engine inputs at the start of every episode whose task is in the catalogue.
+    entries: the loaded entries frame (start, duration_h, project, description[, category]).
+    """
+    from feature_engineering import infer_episodes
+
+    task_manager = engine.task_manager
+    mapper = engine.goal_tracker.category_mapper
+
+    entries = entries.sort_values("start", ignore_index=True)
+    if episodes is None:
+        episodes = infer_episodes(entries, task_manager)
+    tasks = list(task_manager.get_all_tasks().items())
+    task_names = [name for name, _ in tasks]
+    task_idx = {name: i for i, name in enumerate(task_names)}
+    episodes = episodes[episodes["task_name"].isin(task_idx)].sort_values("start", ignore_index=True)
+
+    # entry arrays
+    start_ns = entries["start"].dt.as_unit("ns").astype("int64").to_numpy()   # tz-aware → UTC ns, same order
+    day = _day_numbers(entries["start"])
+    hours = entries["duration_h"].to_numpy(dtype=float)
+    if "category" in entries.columns:
+        category = entries["category"].astype(str).to_numpy(dtype=object)
+    else:
+        pairs = entries[["project", "description"]].drop_duplicates()
+        lookup = {(p, d): mapper.map_entry_to_category(p, d) for p, d in zip(pairs["project"], pairs["description"])}
+        category = np.array([lookup[(p, d)] for p, d in zip(entries["project"], entries["description"])], dtype=object)
+
+    # decision-point arrays
+    t = episodes["start"]
+    ends = np.searchsorted(start_ns, t.dt.as_unit("ns").astype("int64").to_numpy(), side="left")  # entries strictly before t
+    day_t = _day_numbers(t)
+    hour_t = t.dt.hour.to_numpy()
+
+    categories = sorted({info["category"] for _, info in tasks})
+    perf = _performance_scores(engine, day, hours, ends, day_t)
+    goal_by_cat = _goal_scores(engine, day, hours, category, ends, day_t, categories)
+
+    task_cat = np.array([categories.index(info["category"]) for _, info in tasks], dtype=np.intp)
+    difficulty = np.array([int(info["difficulty"]) for _, info in tasks])
+    goal = goal_by_cat[:, task_cat]
+    difficulty_adj = np.where(perf[:, None] < 0.5, 1.3 - 0.1 * difficulty[None, :], 1.0)
+
+    prob = engine.completion_probabilities(perf[:, None], hour_t[:, None], difficulty[None, :], goal)
+    if prob is None:
+        prob = np.ones_like(goal)
+
+    return BacktestData(
+        decision_times = t,
+        task_names     = task_names,
+        target         = episodes["task_name"].map(task_idx).to_numpy(dtype=np.intp),
+        perf           = perf,
+        goal           = goal,
+        difficulty_adj = difficulty_adj,
+        prob           = prob,
+    )
+
+
+def evaluate(data: BacktestData, performance_weight: float, goal_weight: float,
+             ks: Sequence[int] = (1, 3, 5)) -> Dict[str, float]:
+    """hit-rate@k and NDCG (single relevant task) of the engine ranking under these weights"""
+    scores = (performance_weight * data.perf[:, None] + goal_weight * data.goal) * data.difficulty_adj * data.prob
+    rows = np.arange(len(scores))
+    target_score = scores[rows, data.target][:, None]
+
+    # 0-based rank as the engine's stable sort(reverse=True) would place the target
+    cols = np.arange(scores.shape[1])[None, :]
+    rank = (scores > target_score).sum(axis=1) + ((scores == target_score) & (cols < data.target[:, None])).sum(axis=1)
+
+    result = {"decisions": int(len(rank))}
+    for k in ks:
+        result[f"hit@{k}"] = float((rank < k).mean()) if len(rank) else float("nan")
+    result["ndcg"] = float((1.0 / np.log2(rank + 2)).mean()) if len(rank) else float("nan")
+    result["mean_rank"] = float(rank.mean() + 1) if len(rank) else float("nan")
+    return result
+
+
+def sweep(data: BacktestData, performance_weights, ks: Sequence[int] = (1, 3, 5)) -> pd.DataFrame:
+    """
+    evaluate() for each performance weight in [0, 1], goal weight = 1 - it, best NDCG first.
+    Only the weights' ratio changes the ranking, so this one axis covers every distinct setting
+    (and never both at 0, which update_weights can't normalise).
+    """
+    rows = [
+        {"performance_weight": pw, "goal_weight": round(1.0 - pw, 6), **evaluate(data, pw, 1.0 - pw, ks)}
+        for pw in performance_weights
+    ]
+    return pd.DataFrame(rows).sort_values("ndcg", ascending=False, ignore_index=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest recommendation rankings against the tracked history")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5], help="cut-offs for hit-rate@k")
+    parser.add_argument("--grid", type=int, default=11,
+                        help="performance weights in [0, 1], goal weight = 1 - it (1 = current weights only)")
+    parser.add_argument("--probability-grid", action="store_true", help="score with the engine's probability grid")
+    args = parser.parse_args()
+
+    from analytics import load_entries
+    from task_manager import TaskManager
+    from weekly_goals import WeeklyGoalTracker
+    from recommendation_engine import RecommendationEngine
+
+    engine = RecommendationEngine(TaskManager(), WeeklyGoalTracker(), probability_grid=args.probability_grid)
+
+    t0 = time.perf_counter()
+    data = prepare_backtest(engine, load_entries(backend="pandas"))   # replays row by row
+    print(f"Prepared {len(data.target)} decision points in {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    if args.grid > 1:
+        values = np.round(np.linspace(0.0, 1.0, args.grid), 3)
+        report = sweep(data, values, args.k)
+    else:
+        report = pd.DataFrame([{**engine.weights, **evaluate(data, engine.weights["performance"],
+                                                             engine.weights["goal_progress"], args.k)}])
+    print(f"Evaluated {len(report)} weight setting(s) in {time.perf_counter() - t0:.2f}s\n")
+    print(report.head(15).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
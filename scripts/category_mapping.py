@@ -1,15 +1,35 @@
 import json
+import pandas as pd
 from path_manager import paths
 from typing import Optional, Dict, List
+from config_store import ConfigStore, open_default_store
+from config_registry import registry
+from ngram_index import NgramIndex
+
+SUGGEST_THRESHOLD = 0.35   # min trigram similarity for a category suggestion
 
 class CategoryMapper:
     
-    def __init__(self, mapping_path: str = None):
-        mapping_path = mapping_path or paths.category_mapping_file
+    def __init__(self, mapping_path: str = None, store: ConfigStore = None,
+                 mapping_config: Dict = None):
+        # An explicit JSON path wins; otherwise use the SQLite store if one is configured
+        self.store = store or (None if mapping_path else open_default_store())
         
-        with open(mapping_path, 'r') as f:
-            self.mapping_config = json.load(f)
+        if mapping_config is not None:
+            self.mapping_config = mapping_config
+        elif mapping_path:
+            with open(mapping_path, 'r') as f:
+                self.mapping_config = json.load(f)
+        elif store:
+            self.mapping_config = store.load_mapping_config()
+        else:
+            # Shared parsed copy; prefer registry.category_mapper() to share the whole mapper
+            self.mapping_config = registry.get("mapping")
         
+        self._build()
+    
+    def _build(self) -> None:
+        """(Re)build everything derived from mapping_config"""
         self.categories = self.mapping_config['categories']
         self.keywords = self.mapping_config.get('keywords', {})
         self.project_fallback = self.mapping_config.get('project_fallback', {})
@@ -17,6 +37,12 @@ class CategoryMapper:
         
         # Create reverse lookup for faster searching (Hash table: O(1))
         self.task_to_category = self._create_task_lookup()
+        self._suggest_index = None  # built on first suggest_category()
+    
+    def reload(self, mapping_config: Dict) -> None:
+        """Swap in a freshly loaded mapping (called by the config registry)"""
+        self.mapping_config = mapping_config
+        self._build()
     
     def _create_task_lookup(self) -> Dict[str, str]:
         """Create a reverse lookup dictionary for faster task mapping"""
@@ -78,9 +104,13 @@ class CategoryMapper:
         
         if task_lower not in [t.lower() for t in self.categories[category]]:
             self.categories[category].append(task_description)
+            if self.store:
+                self.store.add_category_task(category, task_description)
+                registry.mark_written("mapping")
             
         # Update the lookup dictionary
         self.task_to_category[task_lower] = category
+        self._suggest_index = None
     
     def get_tasks_for_category(self, category: str) -> List[str]:
         """Get all tasks for a specific category"""
@@ -90,19 +120,73 @@ class CategoryMapper:
         """Get list of all categories"""
         return list(self.categories.keys())
     
+    def suggest_category(self, description: str, threshold: float = SUGGEST_THRESHOLD):
+        """(category, matched task/keyword, similarity) closest to the description, or None"""
+        if self._suggest_index is None:
+            # Every mapped task name and keyword, labelled with its category
+            entries = [(task, category) for category, tasks in self.categories.items() for task in tasks]
+            entries += [(kw, category) for category, kws in self.keywords.items() for kw in kws]
+            self._suggest_index = NgramIndex(entries)
+        return self._suggest_index.best(description, threshold=threshold)
+    
+    def unmapped_report(self, df) -> pd.DataFrame:
+        """
+        Descriptions that fall through to the default category, with how often and how
+        long they were tracked, plus a suggested category from the trigram index.
+        Works on distinct (project, description) pairs, not rows.
+        """
+        columns = ['description', 'entries', 'hours', 'suggested_category', 'matched', 'similarity']
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+        
+        pairs = (df.groupby(['project', 'description'], observed=True, dropna=False)['duration_h']
+                   .agg(['size', 'sum'])
+                   .reset_index())
+        pairs['mapped'] = [
+            self.map_entry_to_category(p, d) for p, d in zip(pairs['project'], pairs['description'])
+        ]
+        pairs['description'] = pairs['description'].astype(str).str.strip()
+        unmapped = pairs[(pairs['mapped'] == self.default_category) & (pairs['description'] != '')]
+        
+        report = (unmapped.groupby('description')
+                          .agg(entries=('size', 'sum'), hours=('sum', 'sum'))
+                          .reset_index())
+        suggestions = [self.suggest_category(d) or (None, None, 0.0) for d in report['description']]
+        report['suggested_category'] = [s[0] for s in suggestions]
+        report['matched'] = [s[1] for s in suggestions]
+        report['similarity'] = [round(s[2], 3) for s in suggestions]
+        return report.sort_values('hours', ascending=False, ignore_index=True)[columns]
+    
     def get_unmapped_tasks(self, df) -> List[str]:
-        """Get list of task descriptions that don't have category mappings"""
-        unmapped = []
-        for _, row in df.iterrows(): # returns index and row of dataframe
-            if self.get_category_for_row(row) == self.default_category:
-                task_desc = row.get('description', '').strip()
-                if task_desc and task_desc not in unmapped:
-                    unmapped.append(task_desc)
-        return unmapped
+        """Get list of task descriptions that don't have category mappings (most hours first)"""
+        return self.unmapped_report(df)['description'].tolist()
     
     def save_mapping(self, mapping_path: str = None) -> None:
         """Save the current mapping configuration back to file"""
+        # With the store backend every change is already committed
+        if self.store and not mapping_path:
+            return
+        
+        to_default = not mapping_path
         mapping_path = mapping_path or paths.category_mapping_file
         
         with open(mapping_path, 'w') as f:
             json.dump(self.mapping_config, f, indent=2)
+        if to_default:
+            registry.mark_written("mapping")  # our own write – no need to reload it
+
+
+def main() -> None:
+    """Print the unmapped descriptions in the processed history with suggested categories"""
+    from analytics import load_entries
+    
+    report = registry.category_mapper().unmapped_report(load_entries(backend="pandas"))
+    if report.empty:
+        print("Every description maps to a category.")
+        return
+    with pd.option_context('display.max_rows', None, 'display.width', 120):
+        print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
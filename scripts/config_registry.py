@@ -0,0 +1,133 @@
+""" Process-wide cache of parsed config files with cheap change detection """
+
+import os
+import json
+import weakref
+import threading
+from typing import Callable, Dict, List
+
+from path_manager import paths
+from config_store import open_default_store
+
+# Named docs → JSON file. tasks / goals / mapping come from the SQLite store instead
+# when CONFIG_DB_FILE is set.
+JSON_DOCS = {
+    "config":  lambda: paths.config_file,
+    "tasks":   lambda: paths.tasks_file,
+    "goals":   lambda: paths.goals_file,
+    "mapping": lambda: paths.category_mapping_file,
+}
+STORE_LOADERS = {
+    "tasks":   "load_tasks_config",
+    "goals":   "load_goals_config",
+    "mapping": "load_mapping_config",
+}
+
+
+class ConfigRegistry:
+    """
+    Loads each config once and hands the same parsed dict to everybody.
+    refresh() compares a cheap signature per doc (mtime + size for files, the
+    revision counter for the SQLite store) and re-parses only what changed,
+    then notifies the objects watching that doc so they can rebuild their
+    derived structures (e.g. the mapper lookup table).
+    """
+
+    def __init__(self):
+        self._docs: Dict[str, Dict] = {}        # key -> {"signature", "value", "version"}
+        self._watchers: Dict[str, List] = {}    # key -> [weak callbacks]
+        self._mapper = None
+        self._lock = threading.RLock()
+
+    # ── sources ──────────────────────────────────────────────────────────────
+    def _source(self, key: str):
+        store = open_default_store() if key in STORE_LOADERS else None
+        if store:
+            return "store", store
+        path = JSON_DOCS[key]() if key in JSON_DOCS else key  # unknown keys are plain JSON paths
+        return "file", path
+
+    def _signature(self, key: str):
+        kind, source = self._source(key)
+        if kind == "store":
+            return ("store", source.revision(key))
+        try:
+            st = os.stat(source)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, key: str) -> Dict:
+        kind, source = self._source(key)
+        if kind == "store":
+            return getattr(source, STORE_LOADERS[key])()
+        with open(source, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ── public API ───────────────────────────────────────────────────────────
+    def get(self, key: str) -> Dict:
+        """Parsed config for 'config' / 'tasks' / 'goals' / 'mapping' or any JSON path"""
+        key = str(key)
+        with self._lock:
+            if key not in self._docs:
+                self._docs[key] = {
+                    "signature": self._signature(key),
+                    "value": self._load(key),
+                    "version": 0,
+                }
+            return self._docs[key]["value"]
+
+    def version(self, key: str) -> int:
+        """Bumped every time the doc is reloaded from disk"""
+        doc = self._docs.get(str(key))
+        return doc["version"] if doc else 0
+
+    def watch(self, key: str, callback: Callable[[Dict], None]) -> None:
+        """Call callback(new_config) whenever the doc is reloaded"""
+        # Weak reference for bound methods so watching doesn't keep objects alive
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        self._watchers.setdefault(str(key), []).append(ref)
+
+    def mark_written(self, key: str) -> None:
+        """The in-memory value was just saved by us: adopt the new signature, skip the reload"""
+        key = str(key)
+        with self._lock:
+            if key in self._docs:
+                self._docs[key]["signature"] = self._signature(key)
+
+    def refresh(self) -> List[str]:
+        """Reload the docs whose signature changed; returns their keys"""
+        changed = []
+        with self._lock:
+            for key, doc in self._docs.items():
+                signature = self._signature(key)
+                if signature == doc["signature"] or signature is None:
+                    continue
+                doc["signature"] = signature
+                doc["value"] = self._load(key)
+                doc["version"] += 1
+                changed.append(key)
+
+            for key in changed:
+                alive = []
+                for ref in self._watchers.get(key, []):
+                    callback = ref()
+                    if callback is not None:
+                        callback(self._docs[key]["value"])
+                        alive.append(ref)
+                self._watchers[key] = alive
+        return changed
+
+    def category_mapper(self):
+        """The shared CategoryMapper, rebuilt in place when the mapping changes"""
+        with self._lock:
+            if self._mapper is None:
+                from category_mapping import CategoryMapper
+                self._mapper = CategoryMapper(mapping_config=self.get("mapping"))
+                self.watch("mapping", self._mapper.reload)
+            return self._mapper
+
+
+# Singleton, like `paths`. Import it as `from config_registry import registry`
+# (not via `scripts.`) so every module shares this one instance.
+registry = ConfigRegistry()
@@ -0,0 +1,345 @@
+""" SQLite backend for tasks.json / goals.json / category_mapping.json """
+
+import json
+import sqlite3
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from path_manager import paths
+
+# ──────────────────────────────────────────────────────────────────────────────
+# One row per task / goal / mapping entry, so an edit touches a single row
+# instead of rewriting a whole JSON file. WAL mode lets several Streamlit
+# sessions read while one of them writes.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    name               TEXT PRIMARY KEY,
+    category           TEXT NOT NULL,
+    difficulty         INTEGER NOT NULL,
+    estimated_duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS goals (
+    category     TEXT PRIMARY KEY,
+    target_hours REAL NOT NULL,
+    priority     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS category_tasks (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT NOT NULL,
+    task     TEXT NOT NULL,
+    UNIQUE (category, task COLLATE NOCASE)
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    category TEXT NOT NULL,
+    keyword  TEXT NOT NULL,
+    PRIMARY KEY (category, keyword)
+);
+CREATE TABLE IF NOT EXISTS project_fallback (
+    project TEXT PRIMARY KEY,
+    action  TEXT NOT NULL
+);
+-- Scalar / small nested values (difficulty_levels, default_category, ...) as JSON
+CREATE TABLE IF NOT EXISTS settings (
+    doc   TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (doc, key)
+);
+-- Bumped by every write so readers can cheaply tell that a document changed
+CREATE TABLE IF NOT EXISTS revisions (
+    doc TEXT PRIMARY KEY,
+    rev INTEGER NOT NULL
+);
+"""
+
+
+class ConfigStore:
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or paths.config_db_file)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per transaction keeps the store thread-safe
+        # (Streamlit runs sessions on different threads) and picklable.
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Atomic write transaction; rolled back if the block raises"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # take the write lock up front instead of failing mid-way
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, doc: str) -> None:
+        conn.execute(
+            "INSERT INTO revisions (doc, rev) VALUES (?, 1) "
+            "ON CONFLICT(doc) DO UPDATE SET rev = rev + 1",
+            (doc,),
+        )
+
+    def revision(self, doc: str) -> int:
+        """Cheap change counter for one document ('tasks', 'goals' or 'mapping')"""
+        rows = self._query("SELECT rev FROM revisions WHERE doc = ?", (doc,))
+        return rows[0][0] if rows else 0
+
+    def is_empty(self) -> bool:
+        return not self._query("SELECT 1 FROM revisions LIMIT 1")
+
+    def _settings(self, doc: str) -> Dict:
+        rows = self._query("SELECT key, value FROM settings WHERE doc = ?", (doc,))
+        return {key: json.loads(value) for key, value in rows}
+
+    @staticmethod
+    def _put_setting(conn: sqlite3.Connection, doc: str, key: str, value) -> None:
+        conn.execute(
+            "INSERT INTO settings (doc, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(doc, key) DO UPDATE SET value = excluded.value",
+            (doc, key, json.dumps(value)),
+        )
+
+    # ── tasks ────────────────────────────────────────────────────────────────
+    def load_tasks_config(self) -> Dict:
+        """Same shape as tasks.json"""
+        config = self._settings("tasks")
+        config["available_tasks"] = {
+            name: {
+                "category": category,
+                "difficulty": difficulty,
+                "estimated_duration": duration,
+            }
+            for name, category, difficulty, duration in self._query(
+                "SELECT name, category, difficulty, estimated_duration FROM tasks ORDER BY rowid"
+            )
+        }
+        return config
+
+    def upsert_task(self, task_name: str, category: str, difficulty: int,
+                    estimated_duration: float) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO tasks (name, category, difficulty, estimated_duration) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET category = excluded.category, "
+                "difficulty = excluded.difficulty, estimated_duration = excluded.estimated_duration",
+                (task_name, category, int(difficulty), float(estimated_duration)),
+            )
+            self._bump(conn, "tasks")
+
+    def delete_task(self, task_name: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE name = ?", (task_name,))
+            self._bump(conn, "tasks")
+
+    # ── goals ────────────────────────────────────────────────────────────────
+    def load_goals_config(self) -> Dict:
+        """Same shape as goals.json"""
+        config = self._settings("goals")
+        config["weekly_goals"] = {
+            category: {"target_hours": target, "priority": priority}
+            for category, target, priority in self._query(
+                "SELECT category, target_hours, priority FROM goals ORDER BY rowid"
+            )
+        }
+        return config
+
+    def upsert_goal(self, category: str, target_hours: float, priority: str) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO goals (category, target_hours, priority) VALUES (?, ?, ?) "
+                "ON CONFLICT(category) DO UPDATE SET target_hours = excluded.target_hours, "
+                "priority = excluded.priority",
+                (category, float(target_hours), priority),
+            )
+            self._bump(conn, "goals")
+
+    def delete_goal(self, category: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM goals WHERE category = ?", (category,))
+            self._bump(conn, "goals")
+
+    # ── category mapping ─────────────────────────────────────────────────────
+    def load_mapping_config(self) -> Dict:
+        """Same shape as category_mapping.json"""
+        config = self._settings("mapping")
+
+        categories = {c: [] for (c,) in self._query("SELECT category FROM categories ORDER BY position")}
+        for category, task in self._query("SELECT category, task FROM category_tasks ORDER BY position"):
+            categories.setdefault(category, []).append(task)
+
+        keywords = {}
+        for category, keyword in self._query("SELECT category, keyword FROM keywords ORDER BY rowid"):
+            keywords.setdefault(category, []).append(keyword)
+
+        config["categories"] = categories
+        config["keywords"] = keywords
+        config["project_fallback"] = dict(
+            self._query("SELECT project, action FROM project_fallback ORDER BY rowid")
+        )
+        return config
+
+    def add_category_task(self, category: str, task: str) -> None:
+        """Append a task to a category (no-op if already there, case-insensitive)"""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO categories (category) VALUES (?)", (category,))
+            conn.execute(
+                "INSERT OR IGNORE INTO category_tasks (category, task) VALUES (?, ?)",
+                (category, task),
+            )
+            self._bump(conn, "mapping")
+
+    def set_project_fallback(self, project: str, action: str) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO project_fallback (project, action) VALUES (?, ?) "
+                "ON CONFLICT(project) DO UPDATE SET action = excluded.action",
+                (project, action),
+            )
+            self._bump(conn, "mapping")
+
+    # ── JSON import / export ─────────────────────────────────────────────────
+    def import_json(self, tasks_path: str = None, goals_path: str = None,
+                    mapping_path: str = None) -> None:
+        """Replace the store contents with the JSON files, in one transaction"""
+        with open(tasks_path or paths.tasks_file, "r", encoding="utf-8") as f:
+            tasks_config = json.load(f)
+        with open(goals_path or paths.goals_file, "r", encoding="utf-8") as f:
+            goals_config = json.load(f)
+        with open(mapping_path or paths.category_mapping_file, "r", encoding="utf-8") as f:
+            mapping_config = json.load(f)
+
+        with self.transaction() as conn:
+            for table in ("tasks", "goals", "categories", "category_tasks",
+                          "keywords", "project_fallback", "settings"):
+                conn.execute(f"DELETE FROM {table}")
+
+            conn.executemany(
+                "INSERT INTO tasks (name, category, difficulty, estimated_duration) VALUES (?, ?, ?, ?)",
+                [
+                    (name, info["category"], int(info["difficulty"]), float(info.get("estimated_duration", 1.0)))
+                    for name, info in tasks_config["available_tasks"].items()
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO goals (category, target_hours, priority) VALUES (?, ?, ?)",
+                [
+                    (category, float(info["target_hours"]), info["priority"])
+                    for category, info in goals_config["weekly_goals"].items()
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO categories (category) VALUES (?)",
+                [(category,) for category in mapping_config["categories"]],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO category_tasks (category, task) VALUES (?, ?)",
+                [
+                    (category, task)
+                    for category, tasks in mapping_config["categories"].items()
+                    for task in tasks
+                ],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO keywords (category, keyword) VALUES (?, ?)",
+                [
+                    (category, keyword)
+                    for category, keyword_list in mapping_config.get("keywords", {}).items()
+                    for keyword in keyword_list
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO project_fallback (project, action) VALUES (?, ?)",
+                list(mapping_config.get("project_fallback", {}).items()),
+            )
+
+            # everything that isn't a row-level table goes into settings
+            for doc, config, row_keys in (
+                ("tasks", tasks_config, {"available_tasks"}),
+                ("goals", goals_config, {"weekly_goals"}),
+                ("mapping", mapping_config, {"categories", "keywords", "project_fallback"}),
+            ):
+                for key, value in config.items():
+                    if key not in row_keys:
+                        self._put_setting(conn, doc, key, value)
+                self._bump(conn, doc)
+
+    def export_json(self, tasks_path: str = None, goals_path: str = None,
+                    mapping_path: str = None) -> None:
+        """Write the store back out as the three JSON config files"""
+        for config, path in (
+            (self.load_tasks_config(), tasks_path or paths.tasks_file),
+            (self.load_goals_config(), goals_path or paths.goals_file),
+            (self.load_mapping_config(), mapping_path or paths.category_mapping_file),
+        ):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=2)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+_stores: Dict[Path, ConfigStore] = {}
+
+def open_default_store() -> Optional[ConfigStore]:
+    """
+    Store configured through CONFIG_DB_FILE in .env, or None when the app should
+    keep using the plain JSON files. A fresh database is seeded from the JSON files.
+    """
+    if paths.config_db_file is None:
+        return None
+
+    db_path = Path(paths.config_db_file)
+    if db_path not in _stores:
+        store = ConfigStore(db_path)
+        if store.is_empty():
+            store.import_json()
+            print(f"Seeded {db_path.name} from JSON configs")
+        _stores[db_path] = store
+    return _stores[db_path]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import / export the SQLite config store")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--db", default=None, help="defaults to CONFIG_DB_FILE")
+    args = parser.parse_args()
+
+    if args.db is None and paths.config_db_file is None:
+        parser.error("set CONFIG_DB_FILE in .env or pass --db")
+
+    store = ConfigStore(args.db)
+    if args.action == "import":
+        store.import_json()
+        print(f"Imported JSON configs → {store.db_path}")
+    else:
+        store.export_json()
+        print(f"Exported {store.db_path} → JSON configs")
+
+
+if __name__ == "__main__":
+    main()
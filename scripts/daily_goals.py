@@ -1,19 +1,23 @@
 from path_manager import paths
+from config_registry import registry
+from analytics import local_dates
 import pandas as pd
 import json
 import datetime as dt
 
 class DailyGoalTracker:
     def __init__(self, config_path: str = None):
-        config_path = config_path or paths.config_file
-        with open(config_path, 'r',encoding="utf-8") as f:
-            self.config = json.load(f)
+        if config_path:
+            with open(config_path, 'r',encoding="utf-8") as f:
+                self.config = json.load(f)
+        else:
+            self.config = registry.get("config")
         self.target_hours = self.config['daily_target_hours']
         self.rolling_window = self.config['rolling_window_days']
     
     def calculate_daily_stats(self, df: pd.DataFrame) -> dict:
         """Calculate daily time stats from Toggl data"""
-        df['date'] = pd.to_datetime(df['start']).dt.date
+        df['date'] = local_dates(df['start'])
         daily_hours = df.groupby('date')['duration_h'].sum()  
         
         # Get last N days
@@ -22,7 +26,7 @@ class DailyGoalTracker:
         
         recent_hours = []
         for day in recent_days:
-            hours = daily_hours.get(day, 0) # panda series could be accessed just like a dict.
+            hours = daily_hours.get(pd.Timestamp(day), 0) # panda series could be accessed just like a dict.
             recent_hours.append(hours)
         
         rolling_avg = sum(recent_hours) / len(recent_hours)
@@ -0,0 +1,123 @@
+""" Pack recommended tasks into the hours left in today's target (bounded knapsack) """
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────────────────────
+SLOT_HOURS = 0.25              # durations / capacity are rounded to 15-minute slots
+EXACT_CELL_LIMIT = 2_000_000   # items × slots above this → greedy straight away
+TIME_BUDGET_S = 0.2            # the DP gives up and falls back to greedy after this
+
+
+@dataclass
+class DailyPlan:
+    tasks: list                          # TaskRecommendation, repeated if planned twice
+    total_hours: float
+    total_score: float
+    capacity_hours: float
+    method: str                          # "exact" | "greedy"
+    solve_ms: float
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def plan_day(recommendations: list, capacity_hours: float,
+             max_repeats: Optional[Dict[str, int]] = None, default_repeats: int = 1,
+             time_budget_s: float = TIME_BUDGET_S, slot_hours: float = SLOT_HOURS) -> DailyPlan:
+    """
+    Choose how many times to do each task so the summed priority score is as high
+    as possible while the summed estimated_duration fits in capacity_hours.
+
+    Exact DP over 15-minute slots for normal catalogues; greedy by score per hour
+    when the table would be too large or the DP runs past time_budget_s.
+    """
+    t0 = time.perf_counter()
+    capacity = int(math.floor(capacity_hours / slot_hours + 1e-9))
+    max_repeats = max_repeats or {}
+
+    items = [
+        (rec, max(1, int(math.ceil(rec.estimated_duration / slot_hours - 1e-9))),
+         max_repeats.get(rec.task_name, default_repeats))
+        for rec in recommendations
+        if rec.priority_score > 0 and max_repeats.get(rec.task_name, default_repeats) > 0
+    ]
+
+    counts, method = None, "greedy"
+    if capacity > 0 and items and len(items) * (capacity + 1) <= EXACT_CELL_LIMIT:
+        counts = _exact_counts(items, capacity, t0 + time_budget_s)
+        method = "exact" if counts is not None else "greedy"
+    if counts is None:
+        counts = _greedy_counts(items, capacity)
+
+    tasks = [rec for (rec, _, _), n in zip(items, counts) for _ in range(n)]
+    return DailyPlan(
+        tasks          = tasks,
+        total_hours    = sum(rec.estimated_duration for rec in tasks),
+        total_score    = sum(rec.priority_score for rec in tasks),
+        capacity_hours = capacity_hours,
+        method         = method,
+        solve_ms       = (time.perf_counter() - t0) * 1000,
+        counts         = {rec.task_name: n for (rec, _, _), n in zip(items, counts) if n},
+    )
+
+
+def _exact_counts(items, capacity, deadline) -> Optional[List[int]]:
+    """
+    Bounded knapsack → 0/1 knapsack by binary splitting each task's copies
+    (1, 2, 4, ... copies as one item), then the classic DP, one vectorised
+    row per item. Returns None if the deadline passes.
+    """
+    parts = []  # (item index, copies, weight, value)
+    for i, (rec, weight, repeats) in enumerate(items):
+        k = 1
+        while repeats > 0:
+            take = min(k, repeats)
+            parts.append((i, take, weight * take, rec.priority_score * take))
+            repeats -= take
+            k *= 2
+
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(parts), capacity + 1), dtype=bool)
+    for p, (_, _, weight, value) in enumerate(parts):
+        if time.perf_counter() > deadline:
+            return None
+        if weight > capacity:
+            continue
+        candidate = best[:-weight] + value
+        better = candidate > best[weight:]
+        taken[p, weight:] = better
+        best[weight:] = np.where(better, candidate, best[weight:])
+
+    # walk the choices back from the full capacity
+    counts = [0] * len(items)
+    c = capacity
+    for p in range(len(parts) - 1, -1, -1):
+        if taken[p, c]:
+            i, copies, weight, _ = parts[p]
+            counts[i] += copies
+            c -= weight
+    return counts
+
+
+def _greedy_counts(items, capacity) -> List[int]:
+    """Score-per-slot greedy; never worse than half the optimum thanks to the best-single check"""
+    counts = [0] * len(items)
+    left = capacity
+    order = sorted(range(len(items)), key=lambda i: items[i][0].priority_score / items[i][1], reverse=True)
+    for i in order:
+        _, weight, repeats = items[i]
+        n = min(repeats, left // weight)
+        counts[i] = n
+        left -= n * weight
+
+    greedy_value = sum(items[i][0].priority_score * n for i, n in enumerate(counts))
+    fitting = [i for i in range(len(items)) if items[i][1] <= capacity]
+    if fitting:
+        single = max(fitting, key=lambda i: items[i][0].priority_score)
+        if items[single][0].priority_score > greedy_value:
+            counts = [0] * len(items)
+            counts[single] = 1
+    return counts
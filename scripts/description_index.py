@@ -0,0 +1,158 @@
+""" Inverted index over entry descriptions: token → ids of the entries using it, in start-time order """
+
+import bisect
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ngram_index import normalize
+
+Posting = Tuple[np.ndarray, np.ndarray]   # (entry ids int64, start times as UTC ns int64), sorted by start
+_EMPTY: Posting = (np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+
+
+def tokenize(text) -> List[str]:
+    """lower-case words, punctuation dropped (same normalisation as ngram_index)"""
+    return normalize(text).split()
+
+
+def _merge(a: Posting, b: Posting) -> Posting:
+    """Two time-sorted postings → one; appending newer entries is the common (copy-only) case"""
+    if not len(a[0]):
+        return b
+    ids, starts = np.concatenate([a[0], b[0]]), np.concatenate([a[1], b[1]])
+    if len(b[1]) and b[1][0] < a[1][-1]:
+        order = np.argsort(starts, kind="stable")
+        ids, starts = ids[order], starts[order]
+    return ids, starts
+
+
+class DescriptionIndex:
+    """
+    Tokenises each distinct description once (an entries frame repeats them a lot)
+    and keeps per token the entry ids sorted by start time. add() / remove() only
+    touch the postings of the tokens in the delta.
+
+    Queries: every query word must match; a word matches any token it is a prefix
+    of ("auth" finds "authentication"). Results are entry ids, newest first.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Posting] = {}
+        self._vocab: List[str] = []          # sorted tokens, for prefix lookups
+        self._vocab_stale = False
+        self._id_sorted: Dict[str, Posting] = {}   # token → posting sorted by id, built on first query
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "DescriptionIndex":
+        index = cls()
+        index.add(df)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    # ── updates ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _token_rows(df: pd.DataFrame):
+        """(token, row positions) for every token in df's descriptions"""
+        descriptions = df["description"].astype("category")
+        codes = descriptions.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(descriptions.cat.categories) + 1))
+
+        token_codes: Dict[str, List[int]] = {}
+        for code, text in enumerate(descriptions.cat.categories):
+            for token in set(tokenize(text)):
+                token_codes.setdefault(token, []).append(code)
+        for token, token_code_list in token_codes.items():
+            yield token, np.concatenate([order[bounds[c]:bounds[c + 1]] for c in token_code_list])
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Index new entries (id, start, description); re-adding an id needs remove() first"""
+        if df.empty:
+            return
+        ids = df["id"].to_numpy(dtype=np.int64)
+        starts = df["start"].dt.as_unit("ns").astype("int64").to_numpy()
+        for token, rows in self._token_rows(df):
+            rows = rows[np.argsort(starts[rows], kind="stable")]
+            if token not in self.postings:
+                self._vocab_stale = True
+            self.postings[token] = _merge(self.postings.get(token, _EMPTY), (ids[rows], starts[rows]))
+            self._id_sorted.pop(token, None)
+
+    def remove(self, df: pd.DataFrame) -> None:
+        """Drop these entries (the rows as they were indexed, so their description is known)"""
+        if df.empty:
+            return
+        ids = df["id"].to_numpy(dtype=np.int64)
+        for token, rows in self._token_rows(df):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            keep = ~np.isin(posting[0], ids[rows])
+            if keep.any():
+                self.postings[token] = (posting[0][keep], posting[1][keep])
+            else:
+                del self.postings[token]
+                self._vocab_stale = True
+            self._id_sorted.pop(token, None)
+
+    # ── queries ──────────────────────────────────────────────────────────────
+    def _tokens(self, word: str) -> List[str]:
+        """Indexed tokens that start with word"""
+        if self._vocab_stale:
+            self._vocab = sorted(self.postings)
+            self._vocab_stale = False
+        vocab = self._vocab
+        lo = bisect.bisect_left(vocab, word)
+        hi = bisect.bisect_left(vocab, word + "\uffff", lo)
+        return [t for t in vocab[lo:hi] if t in self.postings]
+
+    def _id_parts(self, tokens: List[str]) -> List[Posting]:
+        """The tokens' postings sorted by id (for intersections), cached per token until it changes"""
+        parts = []
+        for token in tokens:
+            cached = self._id_sorted.get(token)
+            if cached is None:
+                ids, starts = self.postings[token]
+                order = np.argsort(ids, kind="stable")
+                cached = self._id_sorted[token] = (ids[order], starts[order])
+            parts.append(cached)
+        return parts
+
+    def search(self, query: str, limit: int = None) -> np.ndarray:
+        """ids of the entries matching every word of the query, newest first"""
+        words = list(dict.fromkeys(tokenize(query)))
+        token_sets = [self._tokens(w) for w in words]
+        if not words or not all(token_sets):
+            return _EMPTY[0]
+
+        if len(token_sets) == 1 and len(token_sets[0]) == 1:
+            ids = self.postings[token_sets[0][0]][0][::-1]   # already in time order
+            return ids[:limit] if limit else ids
+
+        # Candidates: the entries of the rarest word. Every other word keeps those found
+        # (binary search) in the id-sorted union of its tokens' postings.
+        sizes = [sum(len(self.postings[t][0]) for t in tokens) for tokens in token_sets]
+        order = np.argsort(sizes, kind="stable")
+        parts = [self.postings[t] for t in token_sets[order[0]]]
+        ids, starts = np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+        if len(parts) > 1:
+            by_id = np.argsort(ids)
+            ids, starts = ids[by_id], starts[by_id]
+            first = np.concatenate([[True], ids[1:] != ids[:-1]])   # several matching tokens → listed once
+            ids, starts = ids[first], starts[first]
+
+        for w in order[1:]:
+            if not len(ids):
+                break
+            parts = self._id_parts(token_sets[w])
+            other = parts[0][0] if len(parts) == 1 else np.sort(np.concatenate([p[0] for p in parts]))
+            pos = np.searchsorted(other, ids).clip(max=len(other) - 1)
+            found = other[pos] == ids
+            ids, starts = ids[found], starts[found]
+
+        ids = ids[np.argsort(starts, kind="stable")[::-1]]
+        return ids[:limit] if limit else ids
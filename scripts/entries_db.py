@@ -0,0 +1,297 @@
+""" Indexed SQLite table of processed Toggl entries """
+
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from path_manager import paths
+from config_registry import registry
+from analytics import split_tags, prepare_entries
+from entry_validation import validate_entries, format_summary
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Times are stored as unix seconds so range filters hit the index directly;
+# `date` / `hour` are local-time copies for cheap GROUP BYs.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id          INTEGER PRIMARY KEY,
+    start_ts    INTEGER NOT NULL,
+    stop_ts     INTEGER,
+    duration    INTEGER NOT NULL,
+    duration_h  REAL NOT NULL,
+    date        TEXT NOT NULL,
+    hour        INTEGER NOT NULL,
+    project_id  INTEGER,
+    project     TEXT,
+    description TEXT,
+    tag_string  TEXT,
+    category    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_start    ON entries (start_ts);
+CREATE INDEX IF NOT EXISTS idx_entries_stop     ON entries (stop_ts);
+CREATE INDEX IF NOT EXISTS idx_entries_project  ON entries (project_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_entries_category ON entries (category, start_ts);
+
+-- tag dictionary + (entry, tag) bridge, so tag filters / GROUP BY tag are integer joins
+CREATE TABLE IF NOT EXISTS tags (
+    tag_id      INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    entry_id    INTEGER NOT NULL,
+    tag_id      INTEGER NOT NULL,
+    PRIMARY KEY (entry_id, tag_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags (tag_id, entry_id);
+"""
+
+COLUMNS = [
+    "id", "start_ts", "stop_ts", "duration", "duration_h", "date", "hour",
+    "project_id", "project", "description", "tag_string", "category",
+]
+
+
+def _unix_seconds(ts: pd.Series) -> pd.Series:
+    return (ts - pd.Timestamp("1970-01-01", tz="UTC")) // pd.Timedelta(seconds=1)
+
+
+class EntriesDB:
+    def __init__(self, db_path: str = None):
+        self.db_path = Path(db_path or paths.entries_db_file)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def upsert_frame(self, df: pd.DataFrame, project_mappings: Dict = None) -> int:
+        """
+        Insert or replace processed entries (process_file output) by id.
+        Rows go through entry_validation first, like the pandas / Polars loads:
+        running / invalid rows are kept out of the table and overlaps resolved
+        against the stored rows around them.
+        """
+        if df.empty:
+            return 0
+
+        project_mappings = project_mappings if project_mappings is not None else load_project_mappings()
+        df = df.copy()
+        df["start"] = pd.to_datetime(df["start"], errors="coerce")   # keeps the offset written by process_file
+        df = self._validate(prepare_entries(df, project_mappings))
+        if df.empty:
+            return 0
+
+        project = df["project"].astype(str)
+        description = df["description"].astype(object).fillna("").astype(str)
+
+        # map each distinct (project, description) pair once instead of every row
+        mapper = registry.category_mapper()   # shared, parsed once, reloaded when the mapping changes
+        pairs = pd.DataFrame({"project": project.values, "description": description.values})
+        distinct = pairs.drop_duplicates()
+        distinct["category"] = [
+            mapper.map_entry_to_category(p, d)
+            for p, d in zip(distinct["project"], distinct["description"])
+        ]
+        category = pairs.merge(distinct, on=["project", "description"], how="left")["category"]
+
+        duration = df["duration"].astype("int64")
+        tag_string = df["tag_string"] if "tag_string" in df.columns else pd.Series("", index=df.index)
+        rows = pd.DataFrame({
+            "id":          df["id"].astype("int64").values,
+            "start_ts":    _unix_seconds(df["start"]).values,
+            "stop_ts":     _unix_seconds(df["stop"]).astype("Int64").values,
+            "duration":    duration.values,
+            "duration_h":  (duration / 3600.0).values,   # not the float32 schema column
+            "date":        df["start"].dt.strftime("%Y-%m-%d").values,
+            "hour":        df["start"].dt.hour.values,
+            "project_id":  df["project_id"].values,
+            "project":     project.values,
+            "description": description.values,
+            "tag_string":  tag_string.astype(object).fillna("").astype(str).values,
+            "category":    category.values,
+        })
+        records = [
+            tuple(None if pd.isna(v) else v.item() if hasattr(v, "item") else v for v in row)
+            for row in rows.itertuples(index=False, name=None)
+        ]
+
+        # split each distinct tag_string once
+        tag_lists = {ts: split_tags(ts) for ts in set(rows["tag_string"])}
+        tag_names = sorted({t for names in tag_lists.values() for t in names})
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO entries ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                records,
+            )
+            # an upserted entry's tags are replaced as a whole
+            conn.executemany("DELETE FROM entry_tags WHERE entry_id = ?", [(r[0],) for r in records])
+            conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(t,) for t in tag_names])
+            tag_ids = self._tag_ids(conn, tag_names)
+            conn.executemany(
+                "INSERT OR IGNORE INTO entry_tags (entry_id, tag_id) VALUES (?, ?)",
+                [(int(entry_id), tag_ids[t])
+                 for entry_id, ts in zip(rows["id"], rows["tag_string"]) for t in tag_lists[ts]],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return len(records)
+
+    def _validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        validate_entries with the configured overlap policy. Stored rows are never
+        changed: a new row overlapping one is clipped instead (as in LiveEntries).
+        """
+        ends = df["start"] + pd.to_timedelta(df["duration"].clip(lower=0), unit="s")
+        fixed = None
+        if df["start"].notna().any():
+            # only the stored rows that can overlap the frame, minus the ones it replaces
+            lo = int(_unix_seconds(df["start"]).min())
+            hi = int(_unix_seconds(ends).max())
+            stored = self.query(
+                "SELECT id, start_ts, stop_ts, duration FROM entries WHERE stop_ts > ? AND start_ts < ?", (lo, hi)
+            )
+            stored = stored[~stored["id"].isin(df["id"])]
+            fixed = pd.DataFrame({
+                "start":    pd.to_datetime(stored["start_ts"], unit="s", utc=True),
+                "stop":     pd.to_datetime(stored["stop_ts"], unit="s", utc=True),
+                "duration": stored["duration"],
+            })
+        result = validate_entries(df, fixed=fixed)
+        if len(result.quarantine) or result.summary["adjusted"] or result.summary["overlaps_left"]:
+            print(f"DB validation: {format_summary(result.summary)}")
+
+        # a stored row whose new version is quarantined (e.g. a timer restarted) is dropped
+        if len(result.quarantine):
+            self.delete_ids(result.quarantine["id"].unique())
+        return result.entries
+
+    @staticmethod
+    def _tag_ids(conn: sqlite3.Connection, names) -> Dict[str, int]:
+        ids = {}
+        names = list(names)
+        for i in range(0, len(names), 500):   # stay under SQLite's bound-parameter limit
+            chunk = names[i:i + 500]
+            ids.update(conn.execute(
+                f"SELECT name, tag_id FROM tags WHERE name IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return ids
+
+    def delete_ids(self, ids: Iterable[int]) -> None:
+        params = [(int(i),) for i in ids]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM entries WHERE id = ?", params)
+            conn.executemany("DELETE FROM entry_tags WHERE entry_id = ?", params)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+
+def where_clause(start_date=None, end_date=None, project_ids=None,
+                 categories=None, description_like: str = None, tags=None):
+    """
+    WHERE clause + params for the common filters. Dates are local calendar days
+    (inclusive) and become start_ts bounds so the index is used.
+    """
+    from process import LOCAL_TZ
+
+    clauses, params = [], []
+    if start_date is not None:
+        clauses.append("start_ts >= ?")
+        params.append(int(pd.Timestamp(start_date, tz=LOCAL_TZ).timestamp()))
+    if end_date is not None:
+        clauses.append("start_ts < ?")
+        params.append(int((pd.Timestamp(end_date, tz=LOCAL_TZ) + pd.Timedelta(days=1)).timestamp()))
+    if project_ids:
+        clauses.append(f"project_id IN ({', '.join('?' * len(project_ids))})")
+        params.extend(int(p) for p in project_ids)
+    if categories:
+        clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+        params.extend(categories)
+    if description_like:
+        clauses.append("description LIKE ?")
+        params.append(f"%{description_like}%")
+    if tags:
+        # entries carrying any of the tags: tag names → ids once, then the bridge index
+        clauses.append(
+            "id IN (SELECT entry_id FROM entry_tags WHERE tag_id IN "
+            f"(SELECT tag_id FROM tags WHERE name IN ({', '.join('?' * len(tags))})))"
+        )
+        params.extend(tags)
+
+    sql = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    return sql, tuple(params)
+
+
+def load_project_mappings() -> Dict:
+    try:
+        with open(paths.data_dir / "project_mappings.json", "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+_dbs: Dict[Path, EntriesDB] = {}
+
+def open_default_db() -> Optional[EntriesDB]:
+    """Database configured through ENTRIES_DB_FILE in .env, or None if disabled"""
+    if paths.entries_db_file is None:
+        return None
+    db_path = Path(paths.entries_db_file)
+    if db_path not in _dbs:
+        _dbs[db_path] = EntriesDB(db_path)
+    return _dbs[db_path]
+
+
+def main() -> None:
+    """Backfill the table from every processed CSV"""
+    parser = argparse.ArgumentParser(description="Load processed CSVs into the entries database")
+    parser.add_argument("--db", default=None, help="defaults to ENTRIES_DB_FILE")
+    args = parser.parse_args()
+
+    if args.db is None and paths.entries_db_file is None:
+        parser.error("set ENTRIES_DB_FILE in .env or pass --db")
+
+    db = EntriesDB(args.db)
+    project_mappings = load_project_mappings()
+    processed_dir = paths.data_dir / "processed"
+    for csv_path in sorted(processed_dir.glob("*.csv")):
+        if csv_path.name == "task_events.csv":
+            continue
+        df = pd.read_csv(csv_path)
+        n = db.upsert_frame(df, project_mappings)
+        print(f" {csv_path.name:<45} → {db.db_path.name}   ({n} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+""" Ingest-time validation: quarantine running / invalid entries and resolve overlapping timers """
+
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from analytics import apply_entry_schema
+from config_registry import registry
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Overlaps are found with one sort + sweep over (start, stop): an entry overlaps
+# the ones before it when it starts before the latest stop seen so far.
+#   clip   the later entry starts where the earlier coverage ends (fully covered
+#          entries are quarantined as "duplicate" / "covered")
+#   merge  a run of overlapping entries becomes its first entry, stretched to the
+#          run's end; the others are quarantined as "merged"
+#   keep   overlaps are only counted
+POLICIES = ("clip", "merge", "keep")
+DEFAULT_POLICY = "clip"
+
+
+@dataclass
+class ValidationResult:
+    entries: pd.DataFrame                 # clean rows, same columns as the input
+    quarantine: pd.DataFrame              # rejected rows + `reason`
+    summary: Dict[str, float] = field(default_factory=dict)
+
+
+def _ns(ts: pd.Series) -> np.ndarray:
+    """tz-aware timestamps → UTC ns (NaT → min int64)"""
+    return ts.dt.as_unit("ns").astype("int64").to_numpy() if len(ts) else np.array([], dtype=np.int64)
+
+
+def _covered_before(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """For each interval (sorted by start): the latest stop among the intervals before it"""
+    cover = np.maximum.accumulate(stops)
+    return np.concatenate([[np.iinfo(np.int64).min], cover[:-1]]) if len(stops) else stops
+
+
+def _fixed_intervals(fixed: pd.DataFrame):
+    """(starts, stops) in UTC ns of already accepted rows, sorted by start"""
+    fixed = fixed.sort_values("start", kind="stable")
+    stops = fixed["stop"].fillna(fixed["start"] + pd.to_timedelta(fixed["duration"], unit="s"))
+    return _ns(fixed["start"]), _ns(stops)
+
+
+def _blocks(starts: np.ndarray, stops: np.ndarray):
+    """Sorted intervals merged into blocks of overlapping or touching ones: (block starts, block stops)"""
+    if not len(starts):
+        return starts, stops
+    first = np.flatnonzero(np.concatenate([[True], starts[1:] > np.maximum.accumulate(stops)[:-1]]))
+    return starts[first], np.maximum.reduceat(stops, first)
+
+
+def _overlaps_left(starts: np.ndarray, stops: np.ndarray) -> int:
+    """Intervals (any order) that start before an earlier-starting one ends"""
+    order = np.argsort(starts, kind="stable")
+    return int((starts[order] < _covered_before(starts[order], stops[order])).sum())
+
+
+def validate_entries(df: pd.DataFrame, policy: Optional[str] = None,
+                     fixed: Optional[pd.DataFrame] = None) -> ValidationResult:
+    """
+    df: entries in the analytics.ENTRY_DTYPES schema (tz-aware start / stop).
+    fixed: already accepted entries (e.g. the loaded frame around a live delta).
+    They are never changed; new rows are clipped against them whatever the policy.
+    """
+    policy = policy or registry.get("config").get("overlap_policy", DEFAULT_POLICY)
+    if policy not in POLICIES:
+        raise ValueError(f"overlap policy must be one of {POLICIES}, got {policy!r}")
+
+    n_in = len(df)
+    hours_in = float(df["duration_h"].clip(lower=0).sum()) if n_in else 0.0   # running rows carry huge negatives
+    reason = pd.Series("", index=df.index, dtype=object)
+
+    # ── running / invalid ────────────────────────────────────────────────────
+    duration = pd.to_numeric(df["duration"], errors="coerce")
+    stop = df["stop"] if "stop" in df.columns else pd.Series(pd.NaT, index=df.index)
+    stop = stop.fillna(df["start"] + pd.to_timedelta(duration.clip(lower=0), unit="s"))
+    reason[duration < 0] = "running"     # Toggl: negative duration while the timer runs
+    invalid = df["start"].isna() | duration.isna() | df["duration_h"].isna() | (stop < df["start"])
+    reason[(reason == "") & invalid] = "invalid"
+
+    ok = df[reason == ""].copy()
+    ok["stop"] = stop[reason == ""]
+    ok = ok.sort_values(["start", "stop"], ascending=[True, False], kind="stable")
+    starts, stops = _ns(ok["start"]), _ns(ok["stop"])
+    new_starts, new_stops = starts.copy(), stops.copy()
+    drop = np.full(len(ok), "", dtype=object)
+
+    # ── overlaps among the new rows ──────────────────────────────────────────
+    cover = _covered_before(starts, stops)
+    overlap = starts < cover
+    n_overlaps = int(overlap.sum())
+    if policy == "clip":
+        new_starts = np.maximum(starts, cover)
+        covered = new_starts >= stops
+        same = np.concatenate([[False], (starts[1:] == starts[:-1]) & (stops[1:] == stops[:-1])])
+        drop[covered & same] = "duplicate"
+        drop[covered & ~same] = "covered"
+    elif policy == "merge" and overlap.any():
+        run_start = np.flatnonzero(~overlap)
+        new_stops[run_start] = np.maximum.reduceat(stops, run_start)
+        drop[overlap] = "merged"
+
+    # ── overlaps with rows that are already accepted ─────────────────────────
+    if policy != "keep" and fixed is not None and not fixed.empty:
+        b_starts, b_stops = _blocks(*_fixed_intervals(fixed))
+        # blocks are disjoint and never touch: a start raised to its block's end
+        # is strictly before the next block, which then caps the stop
+        before = np.searchsorted(b_starts, new_starts, side="right") - 1
+        new_starts = np.where(before >= 0, np.maximum(new_starts, b_stops[before.clip(min=0)]), new_starts)
+        after = before + 1
+        next_start = np.where(after < len(b_starts), b_starts[after.clip(max=len(b_starts) - 1)], np.iinfo(np.int64).max)
+        new_stops = np.minimum(new_stops, next_start)
+        drop[(drop == "") & (new_starts >= new_stops)] = "covered"
+
+    # ── apply ────────────────────────────────────────────────────────────────
+    changed = (new_starts != starts) | (new_stops != stops)
+    keep = drop == ""
+    adjusted = int((changed & keep).sum())   # clipped, or stretched by a merge
+    quarantine_rows = [df[reason != ""].assign(reason=reason[reason != ""])]
+    if (~keep).any():
+        quarantine_rows.append(ok[~keep].assign(reason=drop[~keep]))
+
+    ok = ok[keep]
+    if (changed & keep).any():
+        tz = ok["start"].dt.tz
+        ok["start"] = pd.to_datetime(new_starts[keep], utc=True).tz_convert(tz)
+        ok["stop"] = pd.to_datetime(new_stops[keep], utc=True).tz_convert(tz)
+        ok["duration"] = (new_stops[keep] - new_starts[keep]) // 1_000_000_000
+        ok["duration_h"] = ok["duration"] / 3600.0
+        ok = apply_entry_schema(ok)     # date / week / weekday follow the new start
+    ok = ok.sort_values("start", kind="stable")
+
+    # invariant check: clip / merge leave no overlap among the kept rows and the fixed ones
+    overlaps_left = 0
+    if policy != "keep":
+        starts, stops = _ns(ok["start"]), _ns(ok["stop"])
+        if fixed is not None and not fixed.empty:
+            f_starts, f_stops = _fixed_intervals(fixed)
+            starts, stops = np.concatenate([starts, f_starts]), np.concatenate([stops, f_stops])
+            overlaps_left = -_overlaps_left(f_starts, f_stops)   # fixed rows' own overlaps aren't ours
+        overlaps_left += _overlaps_left(starts, stops)
+
+    quarantine = pd.concat(quarantine_rows) if any(len(q) for q in quarantine_rows) else df.iloc[:0].assign(reason="")
+    counts = quarantine["reason"].value_counts()
+    summary = {
+        "policy":      policy,
+        "rows":        n_in,
+        "kept":        len(ok),
+        "overlaps":    n_overlaps,
+        "adjusted":    adjusted,
+        "overlaps_left": overlaps_left,
+        **{r: int(counts.get(r, 0)) for r in ("running", "invalid", "duplicate", "covered", "merged")},
+        "hours_in":    round(hours_in, 2),
+        "hours_kept":  round(float(ok["duration_h"].sum()), 2),
+    }
+    return ValidationResult(entries=ok, quarantine=quarantine, summary=summary)
+
+
+def format_summary(summary: Dict) -> str:
+    flagged = {k: summary[k] for k in ("running", "invalid", "duplicate", "covered", "merged", "adjusted") if summary.get(k)}
+    left = f" ⚠️ {summary['overlaps_left']} still overlapping" if summary.get("overlaps_left") else ""
+    if not flagged and not summary.get("overlaps"):
+        return f"{summary['rows']} entries, nothing to fix{left}"
+    details = ", ".join(f"{v} {k}" for k, v in flagged.items()) or "none changed"
+    return (f"{summary['rows']} entries, {summary['overlaps']} overlapping ({summary['policy']}): {details}; "
+            f"{summary['hours_in']:.1f} h → {summary['hours_kept']:.1f} h{left}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate the processed entries and write the quarantined rows")
+    parser.add_argument("--policy", choices=POLICIES, default=None, help="overlap policy (default: config.json overlap_policy)")
+    parser.add_argument("--out", default=None, help="CSV for quarantined rows (default: data/quarantine.csv)")
+    args = parser.parse_args()
+
+    from analytics import prepare_entries, read_entries, list_processed_files
+    from path_manager import paths
+
+    result = validate_entries(prepare_entries(read_entries(list_processed_files(paths.data_dir / "processed"))),
+                              policy=args.policy)
+    print(format_summary(result.summary))
+    out = args.out or paths.data_dir / "quarantine.csv"
+    result.quarantine.to_csv(out, index=False)
+    print(f"{len(result.quarantine)} quarantined rows → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from datetime import timedelta
+import numpy as np
 import pandas as pd
 
 from ml_events import TaskEvent
 from recommendation_engine import RecommendationEngine
+from analytics import local_dates
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Heuristic parameters – tweak to taste
@@ -15,7 +17,7 @@ def infer_episodes(entries_df: pd.DataFrame, task_manager):
     """
     Collapse raw Toggl rows into 'episodes'.
     Each episode:
-      • belongs to a single task
+      • belongs to a single task (descriptions are matched to the catalogue fuzzily)
       • may consist of several contiguous rows separated by ≤GAP_MIN
       • is labelled completed / not-completed via COMPLETION_FACTOR
 
@@ -36,8 +38,15 @@ def infer_episodes(entries_df: pd.DataFrame, task_manager):
     entries_df = entries_df.sort_values("start").reset_index(drop=True)
     episodes, current = [], None
 
+    # Resolve every distinct description to its catalogue task once (typos / casing
+    # included, see TaskManager.resolve_task_name); unknown ones keep their own name.
+    resolved = {
+        desc: task_manager.resolve_task_name(desc) or desc
+        for desc in entries_df["description"].unique()
+    }
+
     for _, row in entries_df.iterrows():
-        task_name = row["description"]
+        task_name = resolved[row["description"]]
         meta      = task_manager.get_task_info(task_name) or {}
         est_dur   = meta.get("estimated_duration", 0.5) * 60  # minutes
 
@@ -76,33 +85,33 @@ def infer_episodes(entries_df: pd.DataFrame, task_manager):
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-def toggl_df_to_events(entries_df: pd.DataFrame, task_manager, goal_tracker):
+def week_partitions(episodes_df: pd.DataFrame, halo_days: int):
     """
-    Convert Toggl entries → TaskEvent DataFrame with features for ML.
-
-    Parameters
-    ----------
-    entries_df : pd.DataFrame
-        Raw Toggl rows (same schema as infer_episodes()).
-    task_manager : TaskManager
-    goal_tracker : WeeklyGoalTracker
-
-    Returns
-    -------
-    pd.DataFrame
-        One row per TaskEvent with fields matching the TaskEvent dataclass.
+    Split time-sorted episodes into ISO-week partitions for featurisation.
+    Weekly progress resets every Monday and the performance score only looks back
+    `halo_days`, so a week's features depend on that week plus a short halo of
+    earlier episodes. Yields (partition, n_halo): the halo rows come first and
+    only the rows after them belong to the week.
     """
-    episodes_df = infer_episodes(entries_df, task_manager).sort_values("start").reset_index(drop=True)
-
-    # cache engine for performance-score calls (Sliding window + performance score + cached) 
-    engine = RecommendationEngine(task_manager, goal_tracker)
+    dates = local_dates(episodes_df["start"])
+    monday = dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    # Group boundaries of the (already time-sorted) episodes: one per Monday
+    bounds = np.flatnonzero(np.r_[True, monday.to_numpy()[1:] != monday.to_numpy()[:-1], True])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        halo_start = np.searchsorted(dates.to_numpy(), (monday.iloc[lo] - pd.Timedelta(days=halo_days)).to_datetime64())
+        yield episodes_df.iloc[halo_start:hi], lo - halo_start
+
+
+def _featurize_partition(part: pd.DataFrame, n_halo: int, engine, goal_tracker) -> list:
+    """TaskEvent dicts for the week rows of one partition (rows before n_halo are context only)"""
+    part = part.reset_index(drop=True)
+    part = part.assign(date=local_dates(part["start"]), duration_h=part["cum_minutes"] / 60.0)
     events = []
 
-    for i, ep in episodes_df.iterrows():
+    for i in range(n_halo, len(part)):
+        ep = part.iloc[i]
         # historical slice up to current episode
-        hist_df = episodes_df.iloc[: i + 1].copy()
-        hist_df["date"]       = hist_df["start"].dt.date
-        hist_df["duration_h"] = hist_df["cum_minutes"] / 60.0
+        hist_df = part.iloc[: i + 1]
 
         perf_score = engine.calculate_performance_score(hist_df)
 
@@ -124,5 +133,56 @@ def toggl_df_to_events(entries_df: pd.DataFrame, task_manager, goal_tracker):
                 category_completion  = cat_ratio,
             ).__dict__
         )
+    return events
+
+
+# Worker-side state: task / goal objects are unpickled and the engine built once per process
+_engine = _goal_tracker = None
+
+def _init_worker(task_manager, goal_tracker):
+    global _engine, _goal_tracker
+    _engine, _goal_tracker = RecommendationEngine(task_manager, goal_tracker), goal_tracker
 
-    return pd.DataFrame(events)
+def _featurize_job(job):
+    part, n_halo = job
+    return _featurize_partition(part, n_halo, _engine, _goal_tracker)
+
+
+def toggl_df_to_events(entries_df: pd.DataFrame, task_manager, goal_tracker, n_jobs: int = 1):
+    """
+    Convert Toggl entries → TaskEvent DataFrame with features for ML.
+
+    Parameters
+    ----------
+    entries_df : pd.DataFrame
+        Raw Toggl rows (same schema as infer_episodes()).
+    task_manager : TaskManager
+    goal_tracker : WeeklyGoalTracker
+    n_jobs : int
+        Worker processes for the week partitions (1 = in-process, None = all cores).
+        The output is the same for any value.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per TaskEvent with fields matching the TaskEvent dataclass.
+    """
+    episodes_df = infer_episodes(entries_df, task_manager)
+    if episodes_df.empty:
+        return pd.DataFrame()
+    episodes_df = episodes_df.sort_values("start", kind="stable").reset_index(drop=True)
+
+    halo_days = RecommendationEngine.PERFORMANCE_WINDOW_DAYS
+    jobs = list(week_partitions(episodes_df, halo_days))
+
+    if n_jobs == 1 or len(jobs) == 1:
+        # cache engine for performance-score calls (Sliding window + performance score + cached) 
+        engine = RecommendationEngine(task_manager, goal_tracker)
+        results = [_featurize_partition(part, n_halo, engine, goal_tracker) for part, n_halo in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(task_manager, goal_tracker)) as pool:
+            results = list(pool.map(_featurize_job, jobs))  # map keeps partition order
+
+    return pd.DataFrame([event for events in results for event in events])
@@ -1,19 +1,25 @@
 """ Getting data from Toggl """
 
-import os, json, requests, datetime as dt
+import os, re, gzip, json, bisect, argparse, requests, datetime as dt
+from pathlib import Path
 from dotenv import load_dotenv
-import requests
-import json
+
+from path_manager import paths
 
 
 load_dotenv()
 
 TODAY = dt.date.today()
 SINCE = TODAY - dt.timedelta(days=7) # To get the date one week before. 
-DATA_DIR=r"C:\Codes\Personal_Task_Recommender\data"
+DATA_DIR= paths.data_dir
 RAW_DIR= os.path.join(DATA_DIR,"raw")
 PROCESSED_DIR= os.path.join(DATA_DIR,"processed")
 
+# Raw exports are gzip-compressed NDJSON (one entry per line), written as the pages
+# arrive; older exports are pretty-printed .json files. process.py reads both.
+RAW_SUFFIX = ".ndjson.gz"
+RAW_NAME = re.compile(r"^raw_entries_(\d{4}-\d{2}-\d{2})_to_(\d{4}-\d{2}-\d{2})\.(?:ndjson\.gz|json)$")
+
 TOKEN= os.getenv("TOGGL_API_KEY")
 HAS_API= bool(TOKEN)
 
@@ -51,6 +57,51 @@ def date_2_range(dates):
     
     return range_list
         
+def raw_file_range(name):
+    """(first, last) date of a raw export's file name; None for anything else in raw/"""
+    match = RAW_NAME.match(name)
+    if not match:
+        return None
+    return tuple(dt.date.fromisoformat(d) for d in match.groups())
+
+def fetched_dates(raw_dir=RAW_DIR):
+    """Every date covered by a raw export already on disk"""
+    dates = set()
+    if not os.path.isdir(raw_dir):
+        return dates
+    for name in os.listdir(raw_dir):
+        covered = raw_file_range(name)
+        if covered:
+            dates.update(daterange(*covered))
+    return dates
+
+class RawWriter:
+    """
+    Streams entries into raw_entries_<since>_to_<today>.ndjson.gz, one JSON object
+    per line. It is written as <name>.part and renamed on close(), so an
+    interrupted backfill never leaves a file that marks its dates as fetched.
+    """
+    def __init__(self, since, today, raw_dir=RAW_DIR):
+        os.makedirs(raw_dir, exist_ok=True)
+        self.path = Path(raw_dir) / f"raw_entries_{since}_to_{today}{RAW_SUFFIX}"
+        self._tmp = self.path.with_name(self.path.name + ".part")
+        self._file = gzip.open(self._tmp, "wt", encoding="utf-8")
+        self.count = 0
+
+    def write(self, entries):
+        for entry in entries:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.count += 1
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        print(f"Saved {self.count} entries in {self.path}")
+
+    def discard(self):
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
 def fetch_project_mappings(api_token=TOKEN,dir=DATA_DIR):
     """Fetch project_id -> project_name mappings from Toggl"""
     url = "https://api.track.toggl.com/api/v9/me/projects"
@@ -92,82 +143,84 @@ def fetch_time_entries(api_token=TOKEN,since=SINCE,today=TODAY):
 
 def fetch_all_entries_with_pagination(start_date, end_date, max_entries_per_request=1000):
     """
-    Fetch all entries by automatically splitting date ranges when hitting limits
+    Fetch all entries by automatically splitting date ranges when hitting limits.
+    Each page goes straight to the raw file of its date range, so memory stays at
+    one page whatever the range. Returns the number of entries saved.
     """
     if not ensure_key_or_explain():
-        return []
-    
-
-    all_entries = []
+        return 0
 
     # Filtering out the dates already present in the RAW_DIR.
-    existing_dates= os.listdir(RAW_DIR)
-    existing_dates= [item 
-                     for x in existing_dates
-                     for item in (x.split(".json")[0].split("raw_entries_")[1].split("_to_"))# split operation is from left to right. So, json will be received first. 
-                    ]
-    
-    existing_dates= [dt.datetime.strptime(
-    x, 
-    '%Y-%m-%d'
-).date() for x in existing_dates] 
-
-    existing_dates_set= set(date for date in existing_dates if start_date<=date<=end_date) # The list comprehension inside is just for optimization. You could also just do set(existing_dates)
+    existing_dates_set= set(date for date in fetched_dates() if start_date<=date<=end_date)
     all_dates_needed= set(daterange(start_date,end_date))
     missing_dates= all_dates_needed-existing_dates_set
 
     if not missing_dates:
         print("All data already exists!")
-        return all_entries 
+        return 0
 
     start_date= min(missing_dates)
     end_date= max(missing_dates)
-    
 
-    current_start = start_date
-      
-    while current_start <= end_date:
-        print(f"Fetching from {current_start} to {end_date}")
-        
-        
-        entries = fetch_time_entries(since=current_start, today=end_date)
-        
-        if not entries:
-            break
-            
-        all_entries.extend(entries)
-        
-        # If we got fewer than max, then we don't need multiple iterations.
-        if len(entries) < max_entries_per_request:
-            break
-        
-        # Get the last entry's date and continue from the next day
-        last_entry_start = entries[-1]['start'][:10]  # Get date part
-        current_start = (dt.datetime.strptime(last_entry_start, '%Y-%m-%d').date() # we doing this coz dt.date takes separate integer values.
-        + dt.timedelta(days=1))
-    
+    # One writer per run of missing dates (a range without entries still gets its empty file)
     missing_dates_ranges= date_2_range(sorted(missing_dates))
+    range_starts= [start for start, _ in missing_dates_ranges]
+    writers= [RawWriter(start, end) for start, end in missing_dates_ranges]
 
-    for (start,end) in missing_dates_ranges: 
+    current_start = start_date
+    try:
+        while current_start <= end_date:
+            print(f"Fetching from {current_start} to {end_date}")
+
+            entries = fetch_time_entries(since=current_start, today=end_date)
 
-        data= [x for x in all_entries if start<=dt.datetime.strptime(x["start"][:10], '%Y-%m-%d').date()<=end]
-        write_data(data,since=start,today=end)
+            if not entries:
+                break
+
+            # Route the page: entries on dates that are already on disk are dropped
+            for entry in entries:
+                day = dt.datetime.strptime(entry["start"][:10], '%Y-%m-%d').date()
+                i = bisect.bisect_right(range_starts, day) - 1
+                if i >= 0 and day <= missing_dates_ranges[i][1]:
+                    writers[i].write([entry])
+
+            # If we got fewer than max, then we don't need multiple iterations.
+            if len(entries) < max_entries_per_request:
+                break
+
+            # Get the last entry's date and continue from the next day
+            last_entry_start = entries[-1]['start'][:10]  # Get date part
+            current_start = (dt.datetime.strptime(last_entry_start, '%Y-%m-%d').date() # we doing this coz dt.date takes separate integer values.
+            + dt.timedelta(days=1))
+    except BaseException:
+        for writer in writers:
+            writer.discard()
+        raise
+
+    for writer in writers:
+        writer.close()
+    return sum(writer.count for writer in writers)
 
 def write_data(data: list,raw_dir=RAW_DIR,since=None,today=None): 
+    """Write a list of entries as one raw export (fetch_all_entries_with_pagination streams instead)"""
 
     if not since or not today: 
         since= min(dt.datetime.strptime(x["start"][:10], '%Y-%m-%d').date() for x in data)
         today= max(dt.datetime.strptime(x["start"][:10], '%Y-%m-%d').date() for x in data)
-        
-    outfile= os.path.join(raw_dir,f"raw_entries_{since}_to_{today}.json")
 
-    with open(outfile,"w", encoding="utf-8") as file: 
-        file.write(json.dumps(data,indent=2))
+    writer = RawWriter(since, today, raw_dir)
+    writer.write(data)
+    writer.close()
+    return writer.path
 
-    print(f"Saved {len(data)} entries in {outfile}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Fetch Toggl entries for the dates not yet in data/raw")
+    parser.add_argument("--start", type=dt.date.fromisoformat, default=SINCE, help="YYYY-MM-DD (default: a week ago)")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default=TODAY, help="YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+    fetch_all_entries_with_pagination(args.start, args.end)
 
-start_date = dt.date(2025, 7,18)  
-end_date = dt.date(2025, 7, 21)     
-fetch_all_entries_with_pagination(start_date,end_date)
 
+if __name__ == "__main__":
+    main()
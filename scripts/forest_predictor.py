@@ -0,0 +1,123 @@
+""" Pure-NumPy evaluator for the trained completion forest (no scikit-learn at serving time) """
+
+from pathlib import Path
+
+import numpy as np
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Every tree of the ensemble is flattened into one set of node arrays:
+#   feature / threshold   split of each internal node
+#   left / right          global child index, -1 on leaves
+#   value                 per-node class probabilities (already normalised)
+#   roots                 global index of each tree's root
+TREE_LEAF = -1
+LARGE_BATCH = 2048   # above this many samples, evaluate tree by tree (see apply)
+
+
+def export_forest(model, path) -> Path:
+    """Write a fitted RandomForest / ExtraTrees classifier as flat arrays (.npz)"""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == TREE_LEAF
+
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+
+        features.append(tree.feature.astype(np.int64))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, TREE_LEAF, left + offset))
+        rights.append(np.where(is_leaf, TREE_LEAF, right + offset))
+        values.append(value / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+
+    path = Path(path)
+    np.savez(
+        path,
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        value=np.concatenate(values),
+        roots=np.asarray(roots, dtype=np.int64),
+        classes=np.asarray(model.classes_),
+        n_features=np.int64(model.n_features_in_),
+    )
+    return path
+
+
+class CompiledForest:
+    """
+    Drop-in for the bits of RandomForestClassifier the engine uses
+    (predict_proba + classes_), evaluated with vectorised array gathers.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"]
+        self.n_features_in_ = int(arrays["n_features"])
+
+    @classmethod
+    def load(cls, path) -> "CompiledForest":
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({k: arrays[k] for k in arrays.files})
+
+    def apply(self, X) -> np.ndarray:
+        """Global leaf index reached by every (tree, sample): shape (n_trees, n_samples)"""
+        # sklearn evaluates trees on float32 input; casting the same way keeps
+        # the `x <= threshold` decisions (and therefore the output) identical.
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) <= LARGE_BATCH:
+            return self._apply_all_trees(X)
+        return np.stack([self._apply_one_tree(X, root) for root in self.roots])
+
+    def _apply_all_trees(self, X) -> np.ndarray:
+        # Small batches (a handful of tasks): walk all trees and samples one level
+        # per iteration, so the Python overhead is only ~depth iterations.
+        rows = np.arange(len(X))[None, :]
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        while True:
+            left = self.left[node]
+            internal = left != TREE_LEAF
+            if not internal.any():
+                return node
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, left, self.right[node]), node)
+
+    def _apply_one_tree(self, X, root) -> np.ndarray:
+        # Large batches: one tree at a time keeps the working set in cache, and only
+        # samples still on internal nodes are carried to the next level.
+        n_features = X.shape[1]
+        flat = X.ravel()
+        node = np.full(len(X), root)
+        active = np.arange(len(X))
+        while active.size:
+            current = node[active]
+            left = self.left[current]
+            internal = left != TREE_LEAF
+            active, current, left = active[internal], current[internal], left[internal]
+            go_left = flat[active * n_features + self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, left, self.right[current])
+        return node
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        # Accumulate tree by tree, in order, like the forest does, so the sums match bit for bit
+        proba = np.zeros((leaves.shape[1], self.value.shape[1]))
+        for k in range(self.value.shape[1]):
+            value_k = np.ascontiguousarray(self.value[:, k])
+            for tree_leaves in leaves:
+                proba[:, k] += value_k[tree_leaves]
+        proba /= len(self.roots)
+        return proba
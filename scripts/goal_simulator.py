@@ -0,0 +1,209 @@
+""" Monte Carlo forecast of the week: P(each weekly goal is reached by Sunday) if the recommendations are followed """
+
+import time
+import argparse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import infer_episodes, COMPLETION_FACTOR
+from recommendation_engine import RecommendationEngine, PRIORITY_MULTIPLIERS, GOAL_LEVEL_SCORES, goal_level
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Every trajectory replays the rest of the week episode by episode: pick the task
+# the engine would rank first (goal scores move as the simulated hours fill the
+# goals), draw completed / not with the completion model's P at that hour, draw
+# the hours from that task's past episodes with the same outcome. All
+# trajectories advance together, one NumPy step per episode; a day ends once
+# the daily target is worked (or at midnight).
+N_SIMULATIONS = 5000
+DEFAULT_START_HOUR = 9.0     # first hour of a simulated day when there is no history
+MIN_EPISODE_H = 5 / 60       # shorter samples are stretched to this, so every step advances the clock
+MAX_STEPS_PER_DAY = 200
+
+
+@dataclass
+class TaskDurations:
+    """Past episode hours per catalogue task, split by outcome, flattened for vectorised sampling"""
+    tasks: List[str]
+    hours: np.ndarray            # every sample, grouped by (task, outcome)
+    offsets: np.ndarray          # (tasks, 2): first sample of (task, not completed / completed)
+    counts: np.ndarray           # (tasks, 2): number of samples, always ≥ 1
+    completion_rate: np.ndarray  # (tasks,): share of completed episodes (0.5 without history)
+    start_hour: float            # median local hour the first entry of a day starts
+
+    @classmethod
+    def from_entries(cls, entries: pd.DataFrame, task_manager) -> "TaskDurations":
+        """Episodes as the completion model sees them (feature_engineering.infer_episodes)"""
+        tasks = list(task_manager.get_all_tasks())
+        episodes = infer_episodes(entries, task_manager) if not entries.empty else pd.DataFrame()
+
+        samples, rates = [], []
+        for name in tasks:
+            est = float(task_manager.get_task_info(name).get("estimated_duration", 1.0))
+            task_eps = episodes[episodes["task_name"] == name] if not episodes.empty else episodes
+            for completed in (False, True):
+                hours = task_eps.loc[task_eps["completed"] == completed, "cum_minutes"].to_numpy(float) / 60 \
+                    if not task_eps.empty else np.array([])
+                if not len(hours):   # no history for this outcome → the catalogue estimate
+                    hours = np.array([est if completed else est * COMPLETION_FACTOR / 2])
+                samples.append(np.maximum(hours, MIN_EPISODE_H))
+            rates.append(float(task_eps["completed"].mean()) if not task_eps.empty else 0.5)
+
+        counts = np.array([len(s) for s in samples], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        if entries.empty:
+            start_hour = DEFAULT_START_HOUR
+        else:
+            starts = entries["start"]
+            first = starts.groupby(starts.dt.date).min()
+            start_hour = float(np.median(first.dt.hour + first.dt.minute / 60))
+        return cls(
+            tasks=tasks,
+            hours=np.concatenate(samples) if samples else np.array([]),
+            offsets=offsets.reshape(-1, 2), counts=counts.reshape(-1, 2),
+            completion_rate=np.array(rates), start_hour=start_hour,
+        )
+
+    def sample(self, rng: np.random.Generator, task: np.ndarray, completed: np.ndarray) -> np.ndarray:
+        outcome = completed.astype(np.intp)
+        n = self.counts[task, outcome]
+        return self.hours[self.offsets[task, outcome] + (rng.random(len(task)) * n).astype(np.int64)]
+
+
+@dataclass
+class WeekForecast:
+    table: pd.DataFrame     # per goal category: done, target, p_hit, p10 / median / p90 projected hours
+    p_all: float            # P(every goal reached)
+    n_sims: int
+    days: int               # simulated days, today included
+    ms: float
+
+
+def _score_tables(engine: RecommendationEngine, durations: TaskDurations, task_cat: np.ndarray,
+                  multipliers: np.ndarray, perf: float):
+    """
+    (tasks, 24 hours, 4 goal levels) tables of the engine's priority score and of
+    P(completed). The goal score only takes one value per level, so this is every
+    model call the simulation needs.
+    """
+    difficulty = np.array([int(engine.task_manager.get_task_info(t)["difficulty"]) for t in durations.tasks])
+    # tasks whose category has no goal get the engine's neutral 0.5 at every level
+    mult = np.where(task_cat >= 0, multipliers[task_cat.clip(min=0)], np.nan)
+    goal = np.minimum(1.0, np.asarray(GOAL_LEVEL_SCORES)[None, :] * mult[:, None])
+    goal = np.where(np.isnan(goal), 0.5, goal)                                  # (tasks, levels)
+
+    K = len(durations.tasks)
+    hours = np.arange(24)[None, :, None]
+    probs = engine.completion_probabilities(perf, hours, difficulty[:, None, None], goal[:, None, :])
+
+    diff_adj = 1.3 - 0.1 * difficulty if perf < 0.5 else np.ones(K)
+    score = (engine.weights["performance"] * perf + engine.weights["goal_progress"] * goal)
+    score = np.broadcast_to((score * diff_adj[:, None])[:, None, :], (K, 24, len(GOAL_LEVEL_SCORES)))
+    if probs is None:   # no two-class model: rule-based ranking, completion at the historical rate
+        return score, np.broadcast_to(durations.completion_rate[:, None, None], score.shape)
+    return score * probs, probs
+
+
+def simulate_week(engine: RecommendationEngine, df: pd.DataFrame, durations: TaskDurations,
+                  n_sims: int = N_SIMULATIONS, now: Optional[datetime] = None, seed: int = 0) -> WeekForecast:
+    """
+    Hours per goal category at the end of this week over n_sims trajectories.
+    The performance score is held at today's value; the seed is fixed by default
+    so reruns on the same data give the same numbers.
+    """
+    t0 = time.perf_counter()
+    now = now or datetime.now()
+    rng = np.random.default_rng(seed)
+    goal_tracker = engine.goal_tracker
+
+    categories = list(goal_tracker.weekly_goals)
+    targets = np.array([goal_tracker.weekly_goals[c]["target_hours"] for c in categories], dtype=float)
+    multipliers = np.array([PRIORITY_MULTIPLIERS.get(goal_tracker.weekly_goals[c]["priority"], 1.0) for c in categories])
+    cat_pos = {c: i for i, c in enumerate(categories)}
+    task_cat = np.array([cat_pos.get(engine.task_manager.get_task_info(t)["category"], -1) for t in durations.tasks],
+                        dtype=np.intp)
+
+    progress = goal_tracker.calculate_weekly_progress(df)
+    done = np.array([progress[c]["hours"]["completed"] for c in categories], dtype=float)
+    today = now.date()
+    done_today = float(df.loc[pd.to_datetime(df["date"]) == pd.Timestamp(today), "duration_h"].sum())
+
+    perf = engine.calculate_performance_score(df)
+    score, probs = _score_tables(engine, durations, task_cat, multipliers, perf)
+
+    T, K, C = n_sims, len(durations.tasks), len(categories)
+    hours = np.tile(done, (T, 1))                      # (T, C) goal hours per trajectory
+    days = 7 - now.weekday()                           # today … Sunday
+    target_day = engine.daily_target_hours
+
+    for day in range(days if K and C else 0):
+        if day == 0:
+            clock = np.full(T, now.hour + now.minute / 60)
+            left = np.full(T, max(0.0, target_day - done_today))
+        else:
+            clock = np.full(T, durations.start_hour)
+            left = np.full(T, target_day)
+
+        for _ in range(MAX_STEPS_PER_DAY):
+            active = np.flatnonzero((left > 0) & (clock < 24))
+            if not len(active):
+                break
+            # goal level each task's category is at in each trajectory (unmapped → level 0, constant score)
+            ratio = hours[active] / np.where(targets > 0, targets, np.inf)
+            level = goal_level(ratio)[:, task_cat.clip(min=0)]                   # (A, K)
+            hour = clock[active].astype(np.intp)[:, None]
+            task_scores = score[np.arange(K)[None, :], hour, level]
+            # top-ranked task; argmax keeps the first of equal scores, like the engine's stable sort
+            choice = np.argmax(task_scores, axis=1)
+
+            p = probs[choice, hour[:, 0], level[np.arange(len(active)), choice]]
+            completed = rng.random(len(active)) < p
+            spent = durations.sample(rng, choice, completed)
+
+            cat = task_cat[choice]
+            mapped = cat >= 0
+            hours[active[mapped], cat[mapped]] += spent[mapped]   # one episode per trajectory per step
+            clock[active] += spent
+            left[active] -= spent
+
+    hit = hours >= targets
+    q10, q50, q90 = np.percentile(hours, [10, 50, 90], axis=0) if C else ([], [], [])
+    table = pd.DataFrame({
+        "category": categories,
+        "done":     done,
+        "target":   targets,
+        "p_hit":    hit.mean(axis=0) if C else [],
+        "p10":      q10,
+        "median":   q50,
+        "p90":      q90,
+    })
+    return WeekForecast(table=table, p_all=float(hit.all(axis=1).mean()) if C else 1.0, n_sims=T,
+                        days=days, ms=(time.perf_counter() - t0) * 1000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate the rest of this week: P(each weekly goal is reached)")
+    parser.add_argument("--sims", type=int, default=N_SIMULATIONS, help="number of trajectories")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from analytics import load_entries
+    from task_manager import TaskManager
+    from weekly_goals import WeeklyGoalTracker
+
+    df = load_entries(backend="pandas")
+    engine = RecommendationEngine(TaskManager(), WeeklyGoalTracker())
+    durations = TaskDurations.from_entries(df, engine.task_manager)
+    forecast = simulate_week(engine, df, durations, n_sims=args.sims, seed=args.seed)
+
+    print(forecast.table.round(2).to_string(index=False))
+    print(f"P(all goals) {forecast.p_all:.1%} · {forecast.n_sims} trajectories over {forecast.days} day(s) "
+          f"in {forecast.ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
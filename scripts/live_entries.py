@@ -0,0 +1,417 @@
+""" In-memory entries + aggregates that are updated from new processed files as deltas """
+
+import os
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from analytics import (list_processed_files, read_entries, prepare_entries, load_project_mappings,
+                       align_categories, time_per_day, time_by_project, time_by_tag, TagIndex)
+from feature_engineering import GAP_MIN, COMPLETION_FACTOR
+from description_index import DescriptionIndex
+from entry_validation import validate_entries, format_summary
+from config_registry import registry
+from path_manager import paths
+
+WeekKey = Tuple[int, int]   # (iso_year, iso_week)
+
+
+@dataclass
+class WeekPartition:
+    """One ISO week of entries plus the totals the analytics tab shows for it"""
+    frame: pd.DataFrame
+    total_hours: float
+    daily: pd.DataFrame          # time_per_day(frame)
+    by_project: pd.DataFrame     # time_by_project(frame)
+    projects: list
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "WeekPartition":
+        frame = frame.reset_index(drop=True)
+        by_project = time_by_project(frame)
+        return cls(
+            frame       = frame,
+            total_hours = float(frame["duration_h"].sum()),
+            daily       = time_per_day(frame),
+            by_project  = by_project,
+            projects    = sorted(by_project["project"].astype(str)),
+        )
+
+    def summary(self, projects=None, entry_ids=None):
+        """(total hours, daily, by_project) for the selected projects (and entry ids, e.g. a tag filter);
+        precomputed when all are selected"""
+        frame = self.frame
+        if entry_ids is not None:
+            frame = frame[frame["id"].isin(entry_ids)]
+        elif projects is None or set(projects) >= set(self.projects):
+            return self.total_hours, self.daily, self.by_project
+        if projects is not None:
+            frame = frame[frame["project"].isin(projects)]
+        return float(frame["duration_h"].sum()), time_per_day(frame), time_by_project(frame)
+
+    def tag_hours(self, tag_index: TagIndex) -> pd.DataFrame:
+        """tag → hours for this week, through the (entry_id, tag_id) bridge"""
+        return time_by_tag(self.frame, tag_index)
+
+
+class LiveEntries:
+    """
+    Holds the entries frame plus the aggregates the dashboard needs, and keeps
+    them current by polling data/processed: only files that are new or changed
+    since the last poll are read, and their rows are applied as a delta; ids that
+    no longer appear in any file are removed.
+    A reloaded category mapping (config registry) re-maps the frame on the next poll.
+
+      • df                      entries (analytics.ENTRY_DTYPES schema) + category
+      • daily_hours             date → hours
+      • weekly_category_hours   (iso_year, iso_week, category) → hours
+      • weeks                   (iso_year, iso_week) → WeekPartition
+      • current_episode         the latest work session, as infer_episodes builds it
+      • tag_index()             analytics.TagIndex of the frame, rebuilt lazily per version
+      • descriptions            DescriptionIndex (token → entry ids), patched with every delta; see search()
+      • quarantine              running / invalid / overlapping rows held back by entry_validation (+ reason)
+      • version                 bumped on every applied delta
+
+    A delta never mutates the previous frame: readers holding the old `df`
+    keep a consistent snapshot. One frame per version is shared by every
+    reader; hand out view() rather than `df` to code you don't control.
+    """
+
+    def __init__(self, category_mapper, task_manager, processed_dir=None):
+        self.category_mapper = category_mapper
+        self.task_manager = task_manager
+        self.processed_dir = processed_dir or paths.data_dir / "processed"
+        self._mappings_path = paths.data_dir / "project_mappings.json"
+        self._mappings_signature = self._signature(self._mappings_path)
+        self.project_mappings = load_project_mappings(self._mappings_path)
+
+        self.df = pd.DataFrame()
+        self.daily_hours = pd.Series(dtype=float)
+        self.weekly_category_hours = pd.Series(
+            dtype=float,
+            index=pd.MultiIndex.from_tuples([], names=["iso_year", "iso_week", "category"]),
+        )
+        self.weeks: Dict[WeekKey, WeekPartition] = {}
+        self.current_episode: Optional[Dict] = None
+        self.version = 0
+        self._tag_index: Tuple[int, Optional[TagIndex]] = (-1, None)
+        self.descriptions = DescriptionIndex()
+        self.quarantine = pd.DataFrame(columns=["id", "reason"])
+        self._positions: Tuple[Optional[pd.DataFrame], Optional[pd.Index]] = (None, None)
+
+        self._file_signatures: Dict[str, tuple] = {}
+        self._file_ids: Dict[str, set] = {}   # ids each processed file held at its last read
+        self._mapping_version = registry.version("mapping")
+        self._lock = threading.Lock()
+        self.poll()
+
+    # ── polling ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _changed_files(self):
+        """
+        ([(file, signature)] for files that are new or changed, names of files that
+        disappeared). A changed file's signature is recorded by poll() once it has
+        been read, so a file whose read fails is tried again on the next poll.
+        """
+        changed, seen = [], set()
+        for f in list_processed_files(self.processed_dir):
+            seen.add(f.name)
+            signature = self._signature(f)
+            if self._file_signatures.get(f.name) != signature:
+                changed.append((f, signature))
+        removed = [name for name in self._file_signatures if name not in seen]
+        for name in removed:
+            del self._file_signatures[name]
+        return changed, removed
+
+    def poll(self) -> int:
+        """Apply rows from new / re-processed files and drop deleted ones; returns rows applied + removed"""
+        with self._lock:
+            if self._signature(self._mappings_path) != self._mappings_signature:
+                # project renamed / added by a sync: new names can also mean new categories
+                self._mappings_signature = self._signature(self._mappings_path)
+                self.project_mappings = load_project_mappings(self._mappings_path)
+                self._recategorize(remap_projects=True)
+            if registry.version("mapping") != self._mapping_version:
+                self._mapping_version = registry.version("mapping")
+                self._recategorize()
+
+            changed, removed = self._changed_files()
+            if not changed and not removed:
+                return 0
+
+            # An id that was in a file's previous version (or in a deleted file) and is
+            # now in no file at all was deleted upstream (see toggl_sync.py)
+            gone = set()
+            for name in removed:
+                gone |= self._file_ids.pop(name, set())
+            frames = []
+            for f, signature in changed:
+                try:
+                    frame = read_entries([f])
+                except Exception as e:   # e.g. a file still being written: retried next poll
+                    print(f"⚠️ {f.name} not read ({e}), retrying on the next poll")
+                    continue
+                self._file_signatures[f.name] = signature
+                frames.append(frame)
+                ids = set(frame["id"].astype("int64"))
+                gone |= self._file_ids.get(f.name, set()) - ids
+                self._file_ids[f.name] = ids
+            if gone:
+                gone -= set().union(*self._file_ids.values())
+
+            n = self._apply(pd.concat(frames, ignore_index=True)) if frames else 0
+            if gone:
+                n += self._delete(gone)
+            return n
+
+    def apply_delta(self, delta: pd.DataFrame) -> int:
+        """Apply freshly processed rows (same columns as the processed CSVs)"""
+        with self._lock:
+            return self._apply(delta)
+
+    # ── delta application ────────────────────────────────────────────────────
+    def _apply(self, delta: pd.DataFrame) -> int:
+        """
+        Validation, aggregates, partitions and the description index cost O(delta).
+        The frame itself is not: the upsert's id lookup, the overlap window and the
+        concat scan or copy every loaded row (O(total rows), plain vectorised work).
+        """
+        delta = delta.copy(deep=False)  # Copy-on-Write: only the columns we replace get new memory
+        delta["start"] = pd.to_datetime(delta["start"], errors="coerce")
+        delta = prepare_entries(delta, self.project_mappings)
+        if delta.empty:
+            return 0
+        delta = self._validate(delta)
+        if delta.empty:
+            return 0
+        delta = self._derive_columns(delta)
+
+        df = self.df
+        touched_weeks = set(zip(delta["iso_year"], delta["iso_week"]))
+        if not df.empty:
+            # Upsert by id: entries edited in Toggl and re-processed replace their old row
+            replaced = df["id"].isin(delta["id"])
+            if replaced.any():
+                self._add_to_aggregates(df[replaced], sign=-1)
+                touched_weeks |= set(zip(df.loc[replaced, "iso_year"], df.loc[replaced, "iso_week"]))
+                self.descriptions.remove(df[replaced])
+                df = df[~replaced]
+            appended_in_order = df.empty or delta["start"].min() >= df["start"].max()
+            # same categories on both sides, otherwise concat falls back to object strings
+            df, delta = align_categories(df.copy(deep=False), delta)
+            df = pd.concat([df, delta], ignore_index=True)
+            if not appended_in_order:
+                df = df.sort_values("start", ignore_index=True)
+        else:
+            df = delta.reset_index(drop=True)
+            appended_in_order = True
+
+        self._add_to_aggregates(delta, sign=+1)
+        self.descriptions.add(delta)
+        self._update_partitions(delta, touched_weeks)
+        self._update_current_episode(df, delta, appended_in_order)
+
+        self.df = df
+        self.version += 1
+        return len(delta)
+
+    def _validate(self, delta: pd.DataFrame) -> pd.DataFrame:
+        """
+        Quarantine running / invalid rows and resolve overlaps (entry_validation).
+        Loaded rows are never changed: a delta row overlapping one is clipped instead.
+        """
+        df = self.df
+        fixed = None
+        if not df.empty:
+            # only the loaded rows that can overlap the delta, minus the ones it replaces
+            ends = delta["start"] + pd.to_timedelta(delta["duration"].clip(lower=0), unit="s")
+            near = (df["stop"] > delta["start"].min()) & (df["start"] < ends.max()) & ~df["id"].isin(delta["id"])
+            fixed = df[near]
+        result = validate_entries(delta, fixed=fixed)
+        if len(result.quarantine) or result.summary["adjusted"] or result.summary["overlaps_left"]:
+            print(f"Validation: {format_summary(result.summary)}")
+
+        # a loaded row whose new version is quarantined (e.g. a timer restarted) is dropped ...
+        if not df.empty and len(result.quarantine):
+            self._delete(set(df.loc[df["id"].isin(result.quarantine["id"]), "id"]))
+        # ... and a quarantined row leaves quarantine once a valid version arrives
+        kept = [q for q in (self.quarantine[~self.quarantine["id"].isin(delta["id"])], result.quarantine) if len(q)]
+        self.quarantine = pd.concat(kept, ignore_index=True) if kept else self.quarantine.iloc[:0]
+        return result.entries
+
+    def _delete(self, ids) -> int:
+        """Remove entries by id, subtracting them from the aggregates"""
+        if len(self.quarantine):
+            self.quarantine = self.quarantine[~self.quarantine["id"].isin(list(ids))]
+        df = self.df
+        if df.empty:
+            return 0
+        mask = df["id"].isin(list(ids))
+        if not mask.any():
+            return 0
+        rows = df[mask]
+        self._add_to_aggregates(rows, sign=-1)
+        self.descriptions.remove(rows)
+        df = df[~mask].reset_index(drop=True)
+        self._update_partitions(df.iloc[:0], set(zip(rows["iso_year"], rows["iso_week"])), removed_ids=ids)
+        self._update_current_episode(df, df.iloc[:0], appended_in_order=False)
+
+        self.df = df
+        self.version += 1
+        return len(rows)
+
+    def _derive_columns(self, delta: pd.DataFrame) -> pd.DataFrame:
+        """Goal category for the delta rows only (date / ISO week come from the entry schema)"""
+        # Map each distinct (project, description) pair once
+        pairs = delta[["project", "description"]].drop_duplicates()
+        categories = {
+            (p, d): self.category_mapper.map_entry_to_category(project=p, description=d)
+            for p, d in zip(pairs["project"], pairs["description"])
+        }
+        delta["category"] = pd.Categorical(
+            [categories[(p, d)] for p, d in zip(delta["project"], delta["description"])]
+        )
+        return delta
+
+    def _recategorize(self, remap_projects: bool = False) -> None:
+        """The category (or project) mapping changed on disk: re-map the whole frame (distinct pairs only)"""
+        if self.df.empty:
+            return
+        df = self.df.copy(deep=False)
+        if remap_projects:
+            project_key = df["project_id"].astype(str)
+            df["project"] = project_key.map(self.project_mappings).fillna("Project_" + project_key).astype("category")
+        df = self._derive_columns(df)
+        self.weekly_category_hours = self._weekly(df)
+        self.weeks = {
+            (int(year), int(week)): WeekPartition.from_frame(frame)
+            for (year, week), frame in df.groupby(["iso_year", "iso_week"])
+        }
+        self.df = df
+        self.version += 1
+
+    @staticmethod
+    def _weekly(rows: pd.DataFrame) -> pd.Series:
+        # plain (non-categorical) index so deltas with other categories still line up on add()
+        weekly = rows.groupby(["iso_year", "iso_week", "category"], observed=True)["duration_h"].sum()
+        weekly.index = weekly.index.set_levels(weekly.index.levels[2].astype(str), level=2)
+        return weekly.astype(float)
+
+    def _add_to_aggregates(self, rows: pd.DataFrame, sign: int) -> None:
+        daily = rows.groupby("date")["duration_h"].sum().astype(float) * sign
+        self.daily_hours = self.daily_hours.add(daily, fill_value=0.0)
+
+        weekly = self._weekly(rows) * sign
+        self.weekly_category_hours = self.weekly_category_hours.add(weekly, fill_value=0.0)
+
+    def _update_partitions(self, delta: pd.DataFrame, touched_weeks, removed_ids=()) -> None:
+        """Rebuild only the weeks the delta touched, from their old rows + the new ones"""
+        dropped = set(delta["id"]) | set(removed_ids)
+        weeks = dict(self.weeks)
+        delta_by_week = {
+            (int(year), int(week)): rows for (year, week), rows in delta.groupby(["iso_year", "iso_week"])
+        }
+        for year, week in touched_weeks:
+            key = (int(year), int(week))
+            rows = delta_by_week.get(key, delta.iloc[:0])
+            old = weeks.get(key)
+            if old is not None:
+                kept = old.frame[~old.frame["id"].isin(list(dropped))]
+                kept, rows = align_categories(kept.copy(deep=False), rows.copy(deep=False))
+                rows = pd.concat([kept, rows], ignore_index=True).sort_values("start")
+            if rows.empty:
+                weeks.pop(key, None)
+            else:
+                weeks[key] = WeekPartition.from_frame(rows)
+        self.weeks = weeks
+
+    def _update_current_episode(self, df: pd.DataFrame, delta: pd.DataFrame, appended_in_order: bool) -> None:
+        """Extend the latest episode with the new rows (same rules as infer_episodes)"""
+        if df.empty:
+            self.current_episode = None
+            return
+        if appended_in_order and self.current_episode is not None:
+            rows = delta.sort_values("start")
+            episode = dict(self.current_episode)
+        else:
+            # Back-filled rows: rebuild the episode from the last day of history
+            cutoff = df["start"].max() - timedelta(days=1)
+            rows = df[df["start"] >= cutoff]
+            episode = None
+
+        for start, duration, description in zip(rows["start"], rows["duration"], rows["description"]):
+            task_name = (self.task_manager.resolve_task_name(description) if self.task_manager else None) or description
+            if (
+                episode is None
+                or task_name != episode["task_name"]
+                or (start - episode["last_stop"]) > timedelta(minutes=GAP_MIN)
+            ):
+                meta = (self.task_manager.get_task_info(task_name) if self.task_manager else None) or {}
+                episode = {
+                    "task_name":   task_name,
+                    "category":    meta.get("category", "Misc"),
+                    "difficulty":  int(meta.get("difficulty", 3)),
+                    "start":       start,
+                    "cum_minutes": 0.0,
+                    "est_minutes": meta.get("estimated_duration", 0.5) * 60,
+                }
+            episode["cum_minutes"] += duration / 60.0
+            episode["last_stop"] = start + timedelta(seconds=int(duration))
+
+        if episode is not None:
+            episode["completed"] = episode["cum_minutes"] >= COMPLETION_FACTOR * episode["est_minutes"]
+        self.current_episode = episode
+
+    # ── convenience ──────────────────────────────────────────────────────────
+    def view(self) -> pd.DataFrame:
+        """
+        Per-session handle on the current frame. A shallow copy shares every column
+        with `df`; with Copy-on-Write a session that adds or edits columns only ever
+        changes (and copies) its own, never the shared data.
+        """
+        return self.df.copy(deep=False)
+
+    def tag_index(self) -> TagIndex:
+        """Tag dictionary + (entry_id, tag_id) bridge of the current frame, built once per version"""
+        built_for, index = self._tag_index
+        version = self.version   # read before df: a delta landing in between only costs a rebuild
+        if built_for != version:
+            index = TagIndex.from_frame(self.df)
+            self._tag_index = (version, index)
+        return index
+
+    def search(self, query: str, limit: int = None) -> pd.DataFrame:
+        """Entries whose description matches every word of the query (as word prefixes), newest first"""
+        ids = self.descriptions.search(query, limit)
+        df = self.df
+        frame, positions = self._positions
+        if frame is not df:
+            positions = pd.Index(df["id"]) if not df.empty else pd.Index([], dtype="int64")
+            self._positions = (df, positions)
+        rows = positions.get_indexer(ids)
+        return df.iloc[rows[rows >= 0]]
+
+    def week_keys(self) -> List[WeekKey]:
+        """(iso_year, iso_week) of every week with data, newest first"""
+        return sorted(self.weeks, reverse=True)
+
+    def category_hours_for_week(self, iso_week: int, iso_year: int = None) -> pd.Series:
+        """category → hours for one ISO week (all years if iso_year is None)"""
+        weekly = self.weekly_category_hours
+        if weekly.empty:
+            return pd.Series(dtype=float)
+        mask = weekly.index.get_level_values("iso_week") == iso_week
+        if iso_year is not None:
+            mask &= weekly.index.get_level_values("iso_year") == iso_year
+        return weekly[mask].groupby(level="category").sum()
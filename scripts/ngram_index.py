@@ -0,0 +1,77 @@
+""" Character n-gram similarity index for fuzzy matching of short names (tasks, descriptions) """
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ──────────────────────────────────────────────────────────────────────────────
+N = 3                      # trigrams
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text) -> str:
+    """lower-case, punctuation → space, collapsed whitespace"""
+    return " ".join(_NON_WORD.sub(" ", str(text or "").lower()).split())
+
+
+def ngrams(text: str, n: int = N) -> set:
+    """Set of character n-grams of the normalised text, padded so short words still get grams (none for blank text)"""
+    text = normalize(text)
+    if not text:   # the padding alone would be a gram every blank text shares
+        return set()
+    padded = f"  {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """
+    Inverted index gram → entries. A query only touches the entries that share
+    at least one gram with it, and scores them by Dice similarity of the gram
+    sets (2·|A∩B| / (|A|+|B|), 1.0 for identical normalised strings).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, object]], n: int = N):
+        """entries: (text, label) pairs; label is what a match returns (task name, category, ...)"""
+        self.n = n
+        self.texts: List[str] = []
+        self.labels: List[object] = []
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+
+        for text, label in entries:
+            grams = ngrams(text, n)
+            if not grams:
+                continue
+            idx = len(self.texts)
+            self.texts.append(text)
+            self.labels.append(label)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, query: str, k: int = 5, threshold: float = 0.0) -> List[Tuple[object, str, float]]:
+        """Best k (label, text, score) with score ≥ threshold, highest first"""
+        grams = ngrams(query, self.n)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        scored = [
+            (2.0 * common / (len(grams) + self.sizes[idx]), idx)
+            for idx, common in shared.items()
+        ]
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return [
+            (self.labels[idx], self.texts[idx], score)
+            for score, idx in scored[:k] if score >= threshold
+        ]
+
+    def best(self, query: str, threshold: float = 0.0) -> Optional[Tuple[object, str, float]]:
+        """Single best (label, text, score), or None below threshold"""
+        hits = self.search(query, k=1, threshold=threshold)
+        return hits[0] if hits else None
@@ -19,6 +19,12 @@ class PathManager: # Question: Why not create this as a dataclass?
         self.tasks_file = Path(os.getenv('TASKS_FILE'))
         self.category_mapping_file = Path(os.getenv('CATEGORY_MAPPING_FILE'))
         
+        # Optional SQLite store for the three config files above (None → plain JSON)
+        self.config_db_file = Path(os.getenv('CONFIG_DB_FILE')) if os.getenv('CONFIG_DB_FILE') else None
+        
+        # Optional indexed SQLite copy of the processed entries (None → CSVs only)
+        self.entries_db_file = Path(os.getenv('ENTRIES_DB_FILE')) if os.getenv('ENTRIES_DB_FILE') else None
+        
 
 # Create singleton instance which will be used by all whoever imports it. Also saves time of making instances.
 paths = PathManager()
@@ -1,4 +1,5 @@
 from io import BytesIO
+from datetime import timedelta
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import seaborn as sns
@@ -47,6 +48,10 @@ def rolling_avg_line(daily_df):
 
     fig, ax = plt.subplots(figsize=(10, 4))
     sns.lineplot(data=d, x="date", y="rolling", marker="o", ax=ax)
+    if d["date"].nunique() == 1:
+        # a single day autoscales to ±2 years → thousands of day ticks; keep it to ±1 day
+        day = d["date"].iloc[0]
+        ax.set_xlim(day - timedelta(days=1), day + timedelta(days=1))
 
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))  # MM-DD format
     ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))    # Show every day
@@ -58,3 +63,18 @@ def rolling_avg_line(daily_df):
 
     plt.tight_layout()
     return _to_png(fig)
+
+# 4. Bar chart – hours per category against the weekly goal
+def bar_category_goals(goal_df):
+    d = goal_df.sort_values("hours", ascending=False)
+
+    fig, ax = plt.subplots(figsize=(8, 3.5))
+    sns.barplot(data=d, x="category", y="hours", color="steelblue", ax=ax)
+    targets = d["target"].to_numpy()
+    ax.scatter(range(len(d)), targets, marker="_", s=900, color="crimson", zorder=3, label="Goal")
+
+    ax.set_title("Hours per Category vs Weekly Goal")
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Hours")
+    ax.legend(loc="upper right")
+    return _to_png(fig)
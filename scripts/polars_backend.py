@@ -0,0 +1,197 @@
+""" Optional Polars backend for analytics.py: lazy scans of the processed CSVs, multi-threaded aggregations """
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+import polars as pl
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Selected with "analytics_backend": "polars" in configs/config.json (analytics.py
+# dispatches on the frame type). Entries stay a LazyFrame: a query only reads the
+# CSV columns it uses (projection pushdown) and date filters run inside the scan
+# (predicate pushdown). Aggregations run on Polars' thread pool, one per core;
+# results are small pl.DataFrames that callers turn into pandas with to_pandas()
+# where they hand them to pandas code (UI, plots, reports).
+ENTRY_SCHEMA = {
+    "id":          pl.Int64,
+    "start":       pl.String,    # "YYYY-MM-DD HH:MM:SS+hh:mm", local wall time + offset
+    "stop":        pl.String,
+    "duration":    pl.Int64,
+    "project_id":  pl.Int64,
+    "description": pl.String,
+    "tags":        pl.String,
+    "duration_h":  pl.Float64,
+    "tag_string":  pl.String,
+}
+
+
+def scan_entries(files: Iterable[Path], project_mappings: Optional[Dict[str, str]] = None,
+                 start_date=None, end_date=None, overlap_policy: str = "keep") -> pl.LazyFrame:
+    """
+    Lazy entries frame with the analytics columns (date, week_start, weekday,
+    iso_year, iso_week, hour, project). start_date / end_date are inclusive local
+    dates. Running / unparsable rows are dropped and ids de-duplicated (first file
+    wins); overlap_policy "clip" / "merge" resolves overlapping timers like
+    entry_validation (see resolve_overlaps).
+    """
+    lf = pl.scan_csv([str(f) for f in files], schema_overrides=ENTRY_SCHEMA, empty_string_is_null=False,
+                     missing_columns="insert")
+
+    local_start = pl.col("start").str.slice(0, 19).str.to_datetime("%Y-%m-%d %H:%M:%S", strict=False)
+    if overlap_policy == "keep":
+        # local calendar day straight from the string (analytics.local_dates keeps the wall time too);
+        # filtered inside the scan. With an overlap policy, rows outside the range can still clip
+        # rows inside it, so the range is applied after resolve_overlaps instead.
+        day = pl.col("start").str.slice(0, 10)
+        if start_date is not None:
+            lf = lf.filter(day >= str(start_date))
+        if end_date is not None:
+            lf = lf.filter(day <= str(end_date))
+
+    project_key = pl.col("project_id").cast(pl.String).fill_null("<NA>")   # str(pd.NA), as in prepare_entries
+    project = project_key.replace_strict(project_mappings or {}, default=pl.lit("Project_") + project_key,
+                                         return_dtype=pl.String)
+    lf = (
+        lf.filter(pl.col("duration") >= 0)
+          .with_columns(_local=local_start)
+          .filter(pl.col("_local").is_not_null())
+          .unique(subset="id", keep="first", maintain_order=True)
+    )
+    if overlap_policy != "keep":
+        lf = resolve_overlaps(lf, overlap_policy)
+        if start_date is not None:
+            lf = lf.filter(pl.col("_local").dt.date() >= pl.lit(str(start_date)).str.to_date())
+        if end_date is not None:
+            lf = lf.filter(pl.col("_local").dt.date() <= pl.lit(str(end_date)).str.to_date())
+    return (
+        lf.with_columns(project=project)
+          .with_columns(
+              date       = pl.col("_local").dt.date(),
+              weekday    = (pl.col("_local").dt.weekday() - 1).cast(pl.Int8),   # Monday = 0
+              iso_year   = pl.col("_local").dt.iso_year().cast(pl.Int16),
+              iso_week   = pl.col("_local").dt.week().cast(pl.Int16),
+              hour       = pl.col("_local").dt.hour().cast(pl.Int8),
+          )
+          .with_columns(week_start=pl.col("date") - pl.duration(days=pl.col("weekday")))
+          .drop("_local")
+    )
+
+
+def resolve_overlaps(lf: pl.LazyFrame, policy: str) -> pl.LazyFrame:
+    """
+    entry_validation.validate_entries' clip / merge as lazy expressions: rows sorted
+    by (start, longest first), `_cover` = latest stop before each row.
+      clip   start raised to _cover; rows left empty are dropped
+      merge  the first row of each overlapping run is stretched to the run's end, the rest dropped
+    Changed rows get duration / duration_h from the new interval and `_local` shifted
+    with their start. Invalid rows (no duration_h, stop before start) are dropped too.
+    """
+    if policy not in ("clip", "merge"):
+        raise ValueError(f"overlap policy must be 'keep', 'clip' or 'merge', got {policy!r}")
+    instant = lambda col: pl.col(col).str.to_datetime("%Y-%m-%d %H:%M:%S%z", time_unit="ns", strict=False)
+    lf = (
+        lf.with_columns(_start=instant("start"))
+          .with_columns(_stop=pl.coalesce(instant("stop"), pl.col("_start") + pl.duration(seconds=pl.col("duration"))))
+          .filter(pl.col("_start").is_not_null() & pl.col("duration_h").is_not_null()
+                  & (pl.col("_stop") >= pl.col("_start")))
+          .sort(["_start", "_stop"], descending=[False, True], maintain_order=True)
+          .with_columns(_cover=pl.col("_stop").cum_max().shift(1))
+    )
+    starts_run = pl.col("_cover").is_null() | (pl.col("_start") >= pl.col("_cover"))
+    if policy == "clip":
+        lf = (lf.with_columns(_new_start=pl.max_horizontal("_start", "_cover"), _new_stop=pl.col("_stop"))
+                .filter(pl.col("_new_start") < pl.col("_new_stop")))
+    else:
+        lf = (lf.with_columns(_run=starts_run.cum_sum())
+                .with_columns(_new_start=pl.col("_start"), _new_stop=pl.col("_stop").max().over("_run"),
+                              _stop_text=pl.col("stop").get(pl.col("_stop").arg_max()).over("_run"))
+                .filter(starts_run)
+                .with_columns(stop=pl.col("_stop_text"))
+                .drop("_run", "_stop_text"))
+
+    changed = (pl.col("_new_start") != pl.col("_start")) | (pl.col("_new_stop") != pl.col("_stop"))
+    seconds = (pl.col("_new_stop") - pl.col("_new_start")).dt.total_seconds()
+    return (
+        lf.with_columns(
+              duration   = pl.when(changed).then(seconds).otherwise(pl.col("duration")),
+              duration_h = pl.when(changed).then(seconds / 3600.0).otherwise(pl.col("duration_h")),
+              _local     = pl.col("_local") + (pl.col("_new_start") - pl.col("_start")),
+          )
+          # a clipped start keeps the row's UTC offset
+          .with_columns(start=pl.when(pl.col("_new_start") != pl.col("_start"))
+                              .then(pl.col("_local").dt.strftime("%Y-%m-%d %H:%M:%S") + pl.col("start").str.slice(19))
+                              .otherwise(pl.col("start")))
+          .sort("_new_start", maintain_order=True)
+          .drop("_start", "_stop", "_cover", "_new_start", "_new_stop")
+    )
+
+
+def _lazy(frame) -> pl.LazyFrame:
+    return frame.lazy() if isinstance(frame, pl.DataFrame) else frame
+
+
+def total_time(frame) -> float:
+    return float(_lazy(frame).select(pl.col("duration_h").sum()).collect().item() or 0.0)
+
+
+def time_per_day(frame) -> pl.DataFrame:
+    """date, hours (date order)"""
+    return (_lazy(frame).group_by("date").agg(hours=pl.col("duration_h").sum().cast(pl.Float64))
+            .sort("date").collect())
+
+
+def time_by_project(frame) -> pl.DataFrame:
+    """project, hours (most hours first)"""
+    return (_lazy(frame).group_by("project").agg(hours=pl.col("duration_h").sum().cast(pl.Float64))
+            .sort("hours", descending=True, maintain_order=True).collect())
+
+
+def with_categories(frame, category_mapper) -> pl.LazyFrame:
+    """Adds `category`: each distinct (project, description) is mapped once, then joined back"""
+    lf = _lazy(frame)
+    pairs = lf.select("project", "description").unique().collect()
+    lookup = pairs.with_columns(category=pl.Series(
+        [category_mapper.map_entry_to_category(p, d) for p, d in pairs.iter_rows()], dtype=pl.String))
+    return lf.join(lookup.lazy(), on=["project", "description"], how="left", nulls_equal=True)
+
+
+def category_hours(frame, category_mapper, by: Sequence[str] = (), start_date=None, end_date=None) -> pl.DataFrame:
+    """[*by], category, hours; start_date / end_date are inclusive local dates"""
+    lf = _lazy(frame)
+    if start_date is not None:
+        lf = lf.filter(pl.col("date") >= start_date)
+    if end_date is not None:
+        lf = lf.filter(pl.col("date") <= end_date)
+    # one scan of the needed columns; the pair lookup and the grouping then run in memory
+    lf = lf.select(*by, "project", "description", "duration_h").collect()
+    return (with_categories(lf, category_mapper)
+            .group_by([*by, "category"]).agg(hours=pl.col("duration_h").sum().cast(pl.Float64))
+            .sort([*by, "category"]).collect())
+
+
+def weekly_tables(frame, category_mapper) -> List[pl.DataFrame]:
+    """
+    Per (iso_year, iso_week): totals, daily hours, project hours and category hours,
+    from one scan of the columns they need, the four groupings collected in parallel
+    """
+    week = ["iso_year", "iso_week"]
+    columns = _lazy(frame).select(*week, "date", "week_start", "project", "description", "duration_h").collect()
+    lf = with_categories(columns, category_mapper)
+    hours = pl.col("duration_h").sum().cast(pl.Float64).alias("hours")
+    queries = [
+        lf.group_by(week).agg(hours, entries=pl.len(), week_start=pl.col("week_start").min()).sort(week),
+        lf.group_by([*week, "date"]).agg(hours).sort([*week, "date"]),
+        lf.group_by([*week, "project"]).agg(hours).sort([*week, "hours"], descending=[False, False, True]),
+        lf.group_by([*week, "category"]).agg(hours).sort([*week, "category"]),
+    ]
+    return pl.collect_all(queries)
+
+
+def to_pandas(result: pl.DataFrame) -> pd.DataFrame:
+    """The UI / report boundary: pl.Date columns come back as plain dates, like analytics.time_per_day"""
+    df = result.to_pandas()
+    for col, dtype in result.schema.items():
+        if dtype == pl.Date:
+            df[col] = pd.to_datetime(df[col]).dt.date
+    return df
@@ -1,15 +1,22 @@
 """ JSON --> CSV """
 
+import os
+import gzip
+from itertools import islice
 from pathlib import Path
 import json
 import pandas as pd
 
+from path_manager import paths
+
 # ──────────────────────────────
 # CONFIG ‒ edit as you like
 # ──────────────────────────────
-RAW_DIR      = Path(r"C:\Codes\Personal_Task_Recommender\data\raw")       # where raw_entries_*.json live
-OUT_DIR      = Path(r"C:\Codes\Personal_Task_Recommender\data\processed")   # destination for CSVs
-JSON_PATTERN = "raw_entries_*.json"     # glob pattern to select files
+RAW_DIR      = paths.data_dir / "raw"        # where raw_entries_* live
+OUT_DIR      = paths.data_dir / "processed"  # destination for CSVs
+RAW_PATTERNS = ("raw_entries_*.ndjson.gz",   # gzip NDJSON written by fetch_toggl.py
+                "raw_entries_*.json")        # older pretty-printed exports
+CHUNK_ROWS   = 5000                    # entries parsed / written per step (bounds memory on backfills)
 LOCAL_TZ     = "Asia/Kolkata"          # GMT+05:30
 # ──────────────────────────────
 
@@ -30,18 +37,12 @@ def _list_to_string(v: list | None) -> str:
     return ";".join(map(str, v)) if isinstance(v, list) and v else "" #using map to make sure that numerical tags get converted to string
 
 
-def process_file(json_path: Path,out_dir= OUT_DIR) -> Path | None:
-    """Convert one raw JSON file → processed CSV file."""
-    entries = json.loads(json_path.read_text())
-
-    if not entries:
-        print(f"[WARN] {json_path.name} contains 0 entries – skipped.")
-        return None
-
+def process_entries(entries: list) -> pd.DataFrame:
+    """Raw Toggl time-entry dicts → processed rows (same columns as the CSVs)."""
     df = pd.json_normalize(entries)
 
-    # keep only required columns (if missing, ignore)
-    df = df[[c for c in KEEP_COLS if c in df.columns]]
+    # keep only required columns; missing ones come back empty so every chunk of a file has the same columns
+    df = df.reindex(columns=KEEP_COLS)
 
     # ── time-zone conversion ───────────────────────────────────────
     df["start"] = pd.to_datetime(df["start"], utc=True).dt.tz_convert(LOCAL_TZ)
@@ -59,26 +60,75 @@ def process_file(json_path: Path,out_dir= OUT_DIR) -> Path | None:
 
     df["tag_string"] = df["tags"].apply(_list_to_string)
     # ────────────────────────────────────────────────────────────────
+    return df
+
+
+def iter_raw_entries(raw_path: Path):
+    """Entries of a raw export one at a time: NDJSON line by line, old .json files in one go"""
+    if raw_path.name.endswith(".ndjson.gz"):
+        with gzip.open(raw_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from json.loads(raw_path.read_text())
+
+
+def processed_name(raw_path: Path) -> str:
+    """raw_entries_<range>.ndjson.gz / .json → toggl_entries_<range>.csv"""
+    name = raw_path.name
+    for suffix in (".ndjson.gz", ".json"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return name.replace("raw_entries", "toggl_entries") + ".csv"
+
+
+def list_raw_files(raw_dir: Path = RAW_DIR) -> list:
+    return [f for pattern in RAW_PATTERNS for f in sorted(Path(raw_dir).glob(pattern))]
+
+
+def process_file(raw_path: Path, out_dir= OUT_DIR, db=None, chunk_rows: int = CHUNK_ROWS) -> Path | None:
+    """
+    Convert one raw export → processed CSV file (+ entries database if configured).
+    Read and converted CHUNK_ROWS entries at a time; the CSV is written as
+    <name>.part and renamed at the end, so readers never see half a file.
+    """
+    out_dir = Path(out_dir)
+    csv_path = out_dir / processed_name(raw_path)
+    tmp_path = csv_path.with_name(csv_path.name + ".part")
+
+    # Optional indexed SQL copy (ENTRIES_DB_FILE). Upsert by id, so re-processing a file is safe.
+    from entries_db import open_default_db
+    db = db or open_default_db()
+
+    entries, rows = iter_raw_entries(raw_path), 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+        while chunk := list(islice(entries, chunk_rows)):
+            df = process_entries(chunk)
+            df.to_csv(out, index=False, header=rows == 0) # index= Decides whether the first column will be index or not. 
+            if db:
+                db.upsert_frame(df)
+            rows += len(df)
+
+    if not rows:
+        tmp_path.unlink()
+        print(f"[WARN] {raw_path.name} contains 0 entries – skipped.")
+        return None
 
-    
-    csv_name = json_path.name.replace("raw_entries", "toggl_entries").replace(".json", ".csv")
-    csv_path = out_dir / csv_name
-    df.to_csv(csv_path, index=False) # index= Decides whether the first column will be index or not. 
-    # Also to_csv overwrites the existing path if present. 
-
-    print(f" {json_path.name:<35} → {csv_path.name}   ({len(df)} rows)")
+    os.replace(tmp_path, csv_path)  # overwrites the previous CSV of this export, if any
+    print(f" {raw_path.name:<35} → {csv_path.name}   ({rows} rows)")
     return csv_path
 
 
 def main() -> None:
-    json_files = list(RAW_DIR.glob(JSON_PATTERN))
-    if not json_files:
-        print(f"No files matching {JSON_PATTERN} found in {RAW_DIR}. Nothing to do.")
+    raw_files = list_raw_files()
+    if not raw_files:
+        print(f"No files matching {' / '.join(RAW_PATTERNS)} found in {RAW_DIR}. Nothing to do.")
         return
 
-    for j in json_files:
-        process_file(j)
+    for raw_path in raw_files:
+        process_file(raw_path)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
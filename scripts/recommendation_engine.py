@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
@@ -7,8 +8,58 @@ from task_manager import TaskManager
 from weekly_goals import WeeklyGoalTracker
 from path_manager import paths
 
-import os, joblib
+import os
+from forest_predictor import CompiledForest
 MODEL_PATH = os.path.join(paths.data_dir, "completion_model.joblib")
+COMPILED_MODEL_PATH = os.path.join(paths.data_dir, "completion_model.npz")  # flat arrays, no sklearn needed
+
+RESULT_CACHE_SIZE = 32   # scored catalogues kept per engine (least recently used dropped first)
+GRID_ERROR_ROWS = 1_000_000   # model rows spent checking the probability grid's error
+GRID_ERROR_SAMPLES = 16       # points per grid cell when the model's splits can't be read
+
+def model_signature():
+    """(file, mtime) of the model load_completion_model() would pick up; changes when it is retrained"""
+    for path in (COMPILED_MODEL_PATH, MODEL_PATH):
+        if os.path.exists(path):
+            return (os.path.basename(path), os.stat(path).st_mtime_ns)
+    return None
+
+def load_completion_model():
+    """
+    Prefer the exported NumPy forest (train_completion_model.py writes it next
+    to the .joblib); only fall back to unpickling the sklearn model, and
+    importing sklearn, when there is no export.
+    """
+    if os.path.exists(COMPILED_MODEL_PATH):
+        return CompiledForest.load(COMPILED_MODEL_PATH)
+    if os.path.exists(MODEL_PATH):
+        import joblib
+        return joblib.load(MODEL_PATH)
+    return None
+
+PRIORITY_MULTIPLIERS = {'high': 1.2, 'medium': 1.0, 'low': 0.8}
+GOAL_RATIO_STEPS = (0.5, 0.8, 1.0)          # completion-ratio thresholds of the goal score levels
+GOAL_LEVEL_SCORES = (1.0, 0.8, 0.4, 0.2)    # way behind, halfway, almost done, complete
+
+def goal_level(completion_ratio):
+    """0 (way behind) … 3 (complete) per completion ratio; works on arrays"""
+    return np.searchsorted(GOAL_RATIO_STEPS, completion_ratio, side="right")
+
+def goal_score(completion_ratio, priority_multiplier=1.0):
+    """Goal urgency (0-1): behind goals score high, finished ones low; works on arrays"""
+    return np.minimum(1.0, np.take(GOAL_LEVEL_SCORES, goal_level(completion_ratio)) * priority_multiplier)
+
+def performance_score(target_ratio):
+    """Daily performance (0-1) from average daily hours / daily target; works on arrays"""
+    ratio = np.asarray(target_ratio, dtype=float)
+    return np.select(
+        [ratio >= 1.2, ratio >= 1.0, ratio >= 0.8, ratio >= 0.5],
+        [np.ones_like(ratio),     # exceeding target significantly
+         0.8 + (ratio - 1.0),     # bonus for exceeding
+         0.6 + (ratio - 0.8),     # good progress
+         0.3 + (ratio - 0.5)],    # behind but not terrible
+        ratio * 0.6,              # significantly behind
+    )
 
 @dataclass # Basically a template for classes with storing data like this. So, you are kind of calling a function from a library.
 class TaskRecommendation:
@@ -20,18 +71,27 @@ class TaskRecommendation:
     reasoning: str
 
 class RecommendationEngine:
-    def __init__(self, task_manager: TaskManager, goal_tracker: WeeklyGoalTracker):
+    PERFORMANCE_WINDOW_DAYS = 3  # default look-back of calculate_performance_score
+
+    def __init__(self, task_manager: TaskManager, goal_tracker: WeeklyGoalTracker,
+                 probability_grid: bool = False, grid_bins: Tuple[int, int] = (21, 21)):
         self.task_manager = task_manager
         self.goal_tracker = goal_tracker
-        self.completion_model = (
-    joblib.load(MODEL_PATH) if os.path.exists(MODEL_PATH) else None
-)
+        self.model_version = model_signature()
+        self.completion_model = load_completion_model()
         self._binary_model = (
             self.completion_model is not None
             and hasattr(self.completion_model, "classes_")
             and len(self.completion_model.classes_) == 2
     )
 
+        # Optional lookup table replacing model inference (see build_probability_grid)
+        self.probability_grid = None
+        self.grid_max_error = None
+        self.grid_error_exact = False
+        if probability_grid and self._binary_model:
+            self.build_probability_grid(*grid_bins)
+
         # Scoring weights (tunable)
         self.weights = {
             'performance': 0.4,     # How well you're hitting daily targets
@@ -40,7 +100,14 @@ class RecommendationEngine:
         
         # Performance targets
         self.daily_target_hours = 6.0  # Configurable daily target
-        self.performance_window_days = 3  # Look at last 3 days
+        self.performance_window_days = self.PERFORMANCE_WINDOW_DAYS  # Look at last 3 days
+
+        # Scored catalogues keyed on everything the scores depend on (see _result_key)
+        self._results: "OrderedDict[tuple, List[TaskRecommendation]]" = OrderedDict()
+        # generate_daily_plan's remaining hours + repeat caps, under the same keys (+ max_repeats)
+        self._plan_inputs: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def _safe_prob(self, X):
         """
@@ -50,6 +117,96 @@ class RecommendationEngine:
         proba = self.completion_model.predict_proba(X)
         return proba[:, 1] if proba.shape[1] == 2 else np.zeros(len(X))
 
+    def build_probability_grid(self, perf_bins: int = 21, goal_bins: int = 21) -> float:
+        """
+        Tabulate P(completed) over hour (24) × difficulty (1-5) × perf score × goal
+        score, the last two binned evenly on [0, 1]. Scoring then becomes an array
+        gather. Returns the max approximation error over [0, 1]: a tree model is
+        constant between its split thresholds, so one point per constant piece of
+        each cell covers every input. When there are more pieces than GRID_ERROR_ROWS
+        allows, an even subset is checked instead and the result is only a lower
+        bound (grid_error_exact is False).
+        """
+        perf_nodes = np.linspace(0.0, 1.0, perf_bins)
+        goal_nodes = np.linspace(0.0, 1.0, goal_bins)
+        self.probability_grid = self._model_probs_on(perf_nodes, goal_nodes)
+
+        perf_pts, perf_exact = self._error_points(0, perf_bins)
+        goal_pts, goal_exact = self._error_points(3, goal_bins)
+        # keep 24 × 5 × perf × goal model rows within budget, shrinking both axes alike
+        shrink = np.sqrt(GRID_ERROR_ROWS / (24 * 5 * len(perf_pts) * len(goal_pts)))
+        if shrink < 1:
+            perf_pts = perf_pts[np.unique(np.linspace(0, len(perf_pts) - 1, max(2, int(len(perf_pts) * shrink))).astype(np.intp))]
+            goal_pts = goal_pts[np.unique(np.linspace(0, len(goal_pts) - 1, max(2, int(len(goal_pts) * shrink))).astype(np.intp))]
+        self.grid_error_exact = perf_exact and goal_exact and shrink >= 1
+
+        exact = self._model_probs_on(perf_pts, goal_pts)
+        H, D, P, G = np.meshgrid(np.arange(24), np.arange(1, 6), perf_pts, goal_pts, indexing="ij")
+        errors = np.abs(exact - self._grid_probs(P, H, D, G))
+        self.grid_max_error = float(errors.max()) if errors.size else 0.0
+
+        print(f"Probability grid {self.probability_grid.shape} built, "
+              f"max approximation error {'' if self.grid_error_exact else '≥ '}{self.grid_max_error:.4f} "
+              f"(mean {errors.mean() if errors.size else 0.0:.4f}, "
+              f"{'every' if self.grid_error_exact else 'sampled'} {len(perf_pts)}×{len(goal_pts)} perf×goal pieces)")
+        return self.grid_max_error
+
+    def _error_points(self, feature: int, bins: int) -> Tuple[np.ndarray, bool]:
+        """
+        One input in every interval of [0, 1] where both the model and the nearest
+        grid node are constant (the pieces between cell edges and the model's split
+        thresholds on `feature`), plus the ends. False when the model's splits can't
+        be read: the points are then a dense sample (GRID_ERROR_SAMPLES per cell).
+        """
+        edges = (np.arange(bins - 1) + 0.5) / (bins - 1)          # where the nearest node changes
+        thresholds = self._split_thresholds(feature)
+        exact = thresholds is not None
+        if not exact:
+            thresholds = np.linspace(0.0, 1.0, (bins - 1) * GRID_ERROR_SAMPLES + 1)
+        cuts = np.concatenate([edges, thresholds])
+        cuts = np.unique(np.concatenate([[0.0, 1.0], cuts[(cuts > 0.0) & (cuts < 1.0)]]))
+        # piece midpoints never sit on a threshold or an edge, where the side taken is ambiguous
+        return np.concatenate([[0.0, 1.0], (cuts[:-1] + cuts[1:]) / 2]), exact
+
+    def _split_thresholds(self, feature: int):
+        """Every split threshold on `feature` (CompiledForest or a fitted sklearn forest), else None"""
+        model = self.completion_model
+        if isinstance(model, CompiledForest):
+            return model.threshold[model.feature == feature]
+        trees = [getattr(est, "tree_", None) for est in getattr(model, "estimators_", [model])]
+        if any(t is None for t in trees):
+            return None
+        return np.concatenate([t.threshold[t.feature == feature] for t in trees])
+
+    def _model_probs_on(self, perf_values, goal_values) -> np.ndarray:
+        """Model P(completed) for every hour × difficulty × perf × goal combination"""
+        H, D, P, G = np.meshgrid(np.arange(24), np.arange(1, 6), perf_values, goal_values, indexing="ij")
+        X = np.column_stack([P.ravel(), H.ravel(), D.ravel(), G.ravel()])  # training column order
+        return self._safe_prob(X).reshape(H.shape)
+
+    def _grid_probs(self, perf, hour, difficulty, goal) -> np.ndarray:
+        """Vectorised nearest-node lookup in the probability grid"""
+        grid = self.probability_grid
+        p_idx = np.rint(np.clip(perf, 0.0, 1.0) * (grid.shape[2] - 1)).astype(np.intp)
+        g_idx = np.rint(np.clip(goal, 0.0, 1.0) * (grid.shape[3] - 1)).astype(np.intp)
+        d_idx = np.clip(np.asarray(difficulty, dtype=np.intp) - 1, 0, 4)
+        return grid[np.asarray(hour, dtype=np.intp) % 24, d_idx, p_idx, g_idx]
+
+    def completion_probabilities(self, perf, hour, difficulty, goal):
+        """
+        P(completed) for arrays of model inputs (broadcast together), or None when
+        there is no two-class model. Uses the grid when one has been built.
+        """
+        if not self._binary_model:
+            return None
+        perf, hour, difficulty, goal = np.broadcast_arrays(
+            np.asarray(perf, dtype=float), np.asarray(hour), np.asarray(difficulty), np.asarray(goal, dtype=float)
+        )
+        if self.probability_grid is not None:
+            return self._grid_probs(perf, hour, difficulty, goal)
+        X = np.column_stack([perf.ravel(), hour.ravel(), difficulty.ravel(), goal.ravel()])
+        return self._safe_prob(X).reshape(perf.shape)
+
     def calculate_performance_score(self, df: pd.DataFrame) -> float:
         """
         Calculate performance score based on recent daily hours vs target
@@ -59,9 +216,10 @@ class RecommendationEngine:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=self.performance_window_days - 1)
         
+        dates = pd.to_datetime(df['date'])
         recent_df = df[
-            (df['date'] >= start_date) & 
-            (df['date'] <= end_date)
+            (dates >= pd.Timestamp(start_date)) & 
+            (dates <= pd.Timestamp(end_date))
         ]
         
         if recent_df.empty:
@@ -72,18 +230,7 @@ class RecommendationEngine:
         avg_daily_hours = daily_hours.mean()
         
         # Score based on how close to target (with some bonus for exceeding)
-        ratio = avg_daily_hours / self.daily_target_hours
-        
-        if ratio >= 1.2:
-            return 1.0  # Exceeding target significantly
-        elif ratio >= 1.0:
-            return 0.8 + (ratio - 1.0) * 1.0  # Bonus for exceeding
-        elif ratio >= 0.8:
-            return 0.6 + (ratio - 0.8) * 1.0  # Good progress
-        elif ratio >= 0.5:
-            return 0.3 + (ratio - 0.5) * 1.0  # Behind but not terrible
-        else:
-            return ratio * 0.6  # Significantly behind
+        return float(performance_score(avg_daily_hours / self.daily_target_hours))
     
     def calculate_weekly_goal_score(self, df: pd.DataFrame) -> Dict[str, float]:
         """
@@ -98,40 +245,66 @@ class RecommendationEngine:
             completion_ratio = data['hours']['completed'] / data['hours']['target']
             
             # Score based on completion ratio and priority
-            priority_multiplier = {
-                'high': 1.2,
-                'medium': 1.0, 
-                'low': 0.8
-            }.get(data['priority'], 1.0)
-            
-            # Base score from completion ratio
-            if completion_ratio >= 1.0:
-                base_score = 0.2  # Low priority if already complete
-            elif completion_ratio >= 0.8:
-                base_score = 0.4  # Medium priority if almost done
-            elif completion_ratio >= 0.5:
-                base_score = 0.8  # High priority if halfway
-            else:
-                base_score = 1.0  # Highest priority if way behind
-            
-            goal_scores[category] = min(1.0, base_score * priority_multiplier)
+            priority_multiplier = PRIORITY_MULTIPLIERS.get(data['priority'], 1.0)
+            goal_scores[category] = float(goal_score(completion_ratio, priority_multiplier))
         
         return goal_scores
 
-    def calculate_task_priority_scores(self, df) -> List[TaskRecommendation]:
+    def _result_key(self, data_version, now: datetime) -> tuple:
+        """Every input of calculate_task_priority_scores, as cheap version counters / values"""
+        return (
+            data_version,
+            self.task_manager.version,
+            self.goal_tracker.version,
+            round(self.weights["performance"], 6),
+            round(self.weights["goal_progress"], 6),
+            self.daily_target_hours,
+            self.performance_window_days,
+            self.model_version,
+            self.probability_grid is not None,
+            now.strftime("%Y-%m-%d %H"),   # hour of day feeds the model; the date moves the windows
+        )
+
+    def calculate_task_priority_scores(self, df, data_version=None) -> List[TaskRecommendation]:
         """
         Compute a priority score for every task.
         • If a *binary* completion model exists, weight the score by its probability.
         • If the model is untrained (single-class) or missing, fall back to the
         pure rule-based score so nothing is forced to zero.
+        With data_version (e.g. LiveEntries.version) results are cached per input combination.
         """
+        now = datetime.now()
+        if data_version is None:
+            return self._score_tasks(df, now)
+
+        key = self._result_key(data_version, now)
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            self.cache_hits += 1
+            return list(cached)
+
+        self.cache_misses += 1
+        recommendations = self._score_tasks(df, now)
+        self._results[key] = recommendations
+        if len(self._results) > RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return list(recommendations)
+
+    def _score_tasks(self, df, now: datetime) -> List[TaskRecommendation]:
         perf_score  = self.calculate_performance_score(df)
         goal_scores = self.calculate_weekly_goal_score(df)
-        now         = datetime.now()
+
+        tasks        = list(self.task_manager.get_all_tasks().items())
+        difficulties = np.array([int(info["difficulty"]) for _, info in tasks], dtype=int)
+        task_goals   = np.array([goal_scores.get(info["category"], 0.5) for _, info in tasks], dtype=float)
+
+        # ── ML probability for all tasks in one batch (only if model predicts TWO classes) ──
+        probs = self.completion_probabilities(perf_score, now.hour, difficulties, task_goals) if tasks else None
 
         recommendations = []
 
-        for task_name, info in self.task_manager.get_all_tasks().items():
+        for i, (task_name, info) in enumerate(tasks):
             category   = info["category"]
             difficulty = int(info["difficulty"])
             duration   = info.get("estimated_duration", 1.0)
@@ -148,16 +321,10 @@ class RecommendationEngine:
                 self.weights["goal_progress"] * goal_score
             ) * diff_adj
 
-            # ── ML probability (only if model predicts TWO classes) ────────
-            prob_used = False
-            if self.completion_model:
-                proba = self.completion_model.predict_proba(
-                    [[perf_score, now.hour, difficulty, goal_score]]
-                )
-                if proba.shape[1] == 2:                     # true binary model
-                    prob = proba[0, 1]
-                    base_score *= prob                      # weight by P(completed)
-                    prob_used = True
+            prob_used = probs is not None
+            if prob_used:
+                prob = probs[i]
+                base_score *= prob                      # weight by P(completed)
 
             # score & reasoning
             priority_score = base_score
@@ -213,11 +380,56 @@ class RecommendationEngine:
         return " • ".join(reasons)
     
     def get_top_recommendations(self, df: pd.DataFrame, 
-                              limit: int = 3) -> List[TaskRecommendation]:
-        """Get top N task recommendations"""
-        all_recommendations = self.calculate_task_priority_scores(df)
+                              limit: int = 3, data_version=None) -> List[TaskRecommendation]:
+        """Get top N task recommendations (cached when data_version is given)"""
+        all_recommendations = self.calculate_task_priority_scores(df, data_version)
         return all_recommendations[:limit]
     
+    def generate_daily_plan(self, df: pd.DataFrame, max_repeats: int = 2,
+                            time_budget_s: float = 0.2, data_version=None):
+        """
+        Which tasks should fill the rest of today's daily_target_hours?
+        Value = priority score, weight = estimated_duration. A task may be planned
+        up to max_repeats times, but not for more hours than its category's
+        remaining weekly goal needs.
+        """
+        from daily_planner import plan_day
+
+        now = datetime.now()
+        recommendations = self.calculate_task_priority_scores(df, data_version)
+        if data_version is None:
+            remaining, repeats = self._plan_limits(df, recommendations, max_repeats, now)
+        else:
+            key = (self._result_key(data_version, now), max_repeats)
+            cached = self._plan_inputs.get(key)
+            if cached is None:
+                cached = self._plan_limits(df, recommendations, max_repeats, now)
+                self._plan_inputs[key] = cached
+                if len(self._plan_inputs) > RESULT_CACHE_SIZE:
+                    self._plan_inputs.popitem(last=False)
+            else:
+                self._plan_inputs.move_to_end(key)
+            remaining, repeats = cached
+
+        return plan_day(recommendations, remaining, max_repeats=repeats,
+                        time_budget_s=time_budget_s)
+
+    def _plan_limits(self, df, recommendations, max_repeats: int, now: datetime):
+        """Hours left of today's target, and how often each task may be planned"""
+        done_today = df.loc[pd.to_datetime(df['date']) == pd.Timestamp(now.date()), 'duration_h'].sum()
+        remaining  = max(0.0, self.daily_target_hours - done_today)
+
+        progress = self.goal_tracker.calculate_weekly_progress(df)
+        repeats = {}
+        for rec in recommendations:
+            hours = progress.get(rec.category, {}).get('hours')
+            if hours is None or rec.estimated_duration <= 0:
+                repeats[rec.task_name] = max_repeats
+                continue
+            gap = max(0.0, hours['target'] - hours['completed'])
+            repeats[rec.task_name] = max(1, min(max_repeats, int(np.ceil(gap / rec.estimated_duration))))
+        return remaining, repeats
+
     def update_weights(self, performance_weight: float, goal_weight: float):
         """Update scoring weights"""
         total = performance_weight + goal_weight
@@ -1,20 +1,82 @@
 import json
 from typing import Dict, List, Optional
 from path_manager import paths
-from category_mapping import CategoryMapper
+from config_store import ConfigStore, open_default_store
+from config_registry import registry
+from ngram_index import NgramIndex
+
+TASK_MATCH_THRESHOLD = 0.75   # min trigram similarity for a description to count as a catalogue task
 
 class TaskManager:
-    def __init__(self, tasks_path: str = None):
-        tasks_path = tasks_path or paths.tasks_file
+    _shared_version = 0   # edits to the shared (registry) catalogue, whichever instance made them
+    
+    def __init__(self, tasks_path: str = None, store: ConfigStore = None):
+        # An explicit JSON path wins; otherwise use the SQLite store if one is configured
+        self.store = store or (None if tasks_path else open_default_store())
+        
+        # Default source → shared copy from the registry, reloaded when it changes on disk
+        self._shared = not tasks_path and not store
         
-        with open(tasks_path, 'r') as f:
-            self.tasks_config = json.load(f)
+        if tasks_path:
+            with open(tasks_path, 'r') as f:
+                self.tasks_config = json.load(f)
+        elif store:
+            self.tasks_config = store.load_tasks_config()
+        else:
+            self.tasks_config = registry.get("tasks")
+            registry.watch("tasks", self.reload)
         
         self.available_tasks = self.tasks_config['available_tasks']
         self.difficulty_levels = self.tasks_config.get('difficulty_levels', {})
+        self._version = 0
+        self._reset_name_index()
+        
+        # Shared category mapper for validation (parsed once per process)
+        self.category_mapper = registry.category_mapper()
+    
+    def reload(self, tasks_config: Dict) -> None:
+        """Swap in a freshly loaded tasks config (called by the config registry)"""
+        self.tasks_config = tasks_config
+        self.available_tasks = self.tasks_config['available_tasks']
+        self.difficulty_levels = self.tasks_config.get('difficulty_levels', {})
+        self._touch()
+    
+    @property
+    def version(self) -> int:
+        """Cheap change counter for the catalogue; results computed from it can be keyed on this"""
+        return TaskManager._shared_version if self._shared else self._version
+    
+    def _touch(self) -> None:
+        # Instances sharing the registry's catalogue all see one dict, so an edit made
+        # through any of them has to move the version every one of them reports
+        if self._shared:
+            TaskManager._shared_version += 1
+        else:
+            self._version += 1
+    
+    def _reset_name_index(self) -> None:
+        # Trigram index over task names, built on first resolve_task_name(); resolutions
+        # are cached per distinct description, so both are dropped when the catalogue changes
+        self._name_index = None
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._name_index_version = self.version
+    
+    def resolve_task_name(self, description: str, threshold: float = TASK_MATCH_THRESHOLD) -> Optional[str]:
+        """Catalogue task a Toggl description refers to (exact, then fuzzy), or None"""
+        if description in self.available_tasks:
+            return description
+        if self._name_index_version != self.version:
+            self._reset_name_index()
+        if description in self._resolved:
+            return self._resolved[description]
         
-        # Initialize category mapper for validation
-        self.category_mapper = CategoryMapper()
+        if self._name_index is None:
+            self._name_index = NgramIndex((name, name) for name in self.available_tasks)
+        
+        # Closest trigram match; same text up to case / punctuation scores 1.0
+        hit = self._name_index.best(description, threshold=threshold)
+        self._resolved[description] = hit[0] if hit else None
+        return self._resolved[description]
     
     def get_all_tasks(self) -> Dict:
         """Get all available tasks"""
@@ -62,6 +124,13 @@ class TaskManager:
             "difficulty": difficulty,
             "estimated_duration": estimated_duration
         }
+        self._touch()
+        
+        # Store backend: write the single row now instead of the whole file on save
+        if self.store:
+            self.store.upsert_task(task_name, category, difficulty, estimated_duration)
+            if self._shared:
+                registry.mark_written("tasks")
         
         return True
     
@@ -69,6 +138,11 @@ class TaskManager:
         """Remove a task from the list"""
         if task_name in self.available_tasks:
             self.available_tasks.pop(task_name)
+            self._touch()
+            if self.store:
+                self.store.delete_task(task_name)
+                if self._shared:
+                    registry.mark_written("tasks")
             return True
         return False
     
@@ -107,10 +181,18 @@ class TaskManager:
     
     def save_tasks(self, tasks_path: str = None) -> None:
         """Save tasks configuration back to file"""
+        # With the store backend every add/remove is already committed
+        if self.store and not tasks_path:
+            return
+        
+        to_default = not tasks_path
         tasks_path = tasks_path or paths.tasks_file
         
         with open(tasks_path, 'w',encoding="utf-8") as f:
             json.dump(self.tasks_config, f, indent=2)
+        if self._shared and to_default:
+            registry.mark_written("tasks")  # our own write – no need to reload it
+
     
     def validate_task_categories(self) -> List[str]:
         """Check if all task categories exist in CategoryMapper"""
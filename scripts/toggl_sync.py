@@ -0,0 +1,177 @@
+""" Incremental Toggl sync: download only entries changed since the last sync """
+
+import os
+import json
+import time
+import argparse
+import datetime as dt
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+
+from path_manager import paths
+from process import process_entries
+
+load_dotenv()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Toggl's `since` parameter (unix seconds) returns every entry / project modified
+# after that moment, deleted ones included (server_deleted_at is set). We keep the
+# moment of the last successful sync as a high-water mark in sync_state.json.
+TOKEN = os.getenv("TOGGL_API_KEY")
+API_BASE = os.getenv("TOGGL_API_BASE", "https://api.track.toggl.com/api/v9")  # point at a stub server to test
+BOOTSTRAP_DAYS = 90          # first sync without a mark (Toggl's `since` only reaches ~3 months back)
+OVERLAP_S = 60               # re-ask for the last minute; upserts make the overlap harmless
+
+SYNC_STATE_FILE = paths.data_dir / "sync_state.json"
+PROCESSED_DIR = paths.data_dir / "processed"
+PROJECT_MAPPINGS_FILE = paths.data_dir / "project_mappings.json"
+
+
+def load_state(path: Path = SYNC_STATE_FILE) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(state: Dict, path: Path = SYNC_STATE_FILE) -> None:
+    tmp = Path(path).with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)  # never leave a half-written mark behind
+
+
+def write_csv(df: pd.DataFrame, csv_path: Path) -> None:
+    """Write to <name>.part, then rename: LiveEntries polls data/processed and never sees half a file"""
+    tmp = csv_path.with_name(csv_path.name + ".part")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, csv_path)
+
+
+def _get(endpoint: str, since: int, api_token: str):
+    r = requests.get(f"{API_BASE}{endpoint}", params={"since": since}, auth=(api_token, "api_token"), timeout=30)
+    if r.status_code != 200:
+        print(f"Error: {r.text}")
+    r.raise_for_status()
+    return r.json(), len(r.content)
+
+
+def remove_ids_from_csvs(ids, processed_dir: Path = PROCESSED_DIR, keep: Optional[Path] = None) -> int:
+    """Drop rows with these ids from every processed CSV (except `keep`); returns rows removed"""
+    ids = {int(i) for i in ids}
+    removed = 0
+    for csv_path in processed_dir.glob("*.csv"):
+        if csv_path.name == "task_events.csv" or (keep and csv_path == keep):
+            continue
+        # read the id column only; rewrite just the files that hold one of the ids
+        file_ids = pd.read_csv(csv_path, usecols=["id"])["id"]
+        hit = file_ids.isin(ids)
+        if not hit.any():
+            continue
+        rows = pd.read_csv(csv_path, dtype=str, keep_default_na=False)  # as text → other rows unchanged
+        rows = rows[~hit.to_numpy()]
+        if rows.empty:
+            csv_path.unlink()
+        else:
+            write_csv(rows, csv_path)
+        removed += int(hit.sum())
+    return removed
+
+
+def sync_projects(since: int, api_token: str, mappings_path: Path = PROJECT_MAPPINGS_FILE) -> int:
+    """Merge changed projects into project_mappings.json; the file is only rewritten if one changed"""
+    projects, n_bytes = _get("/me/projects", since, api_token)
+    if not projects:
+        return 0
+    try:
+        with open(mappings_path, "r") as f:
+            mapping = json.load(f)
+    except FileNotFoundError:
+        mapping = {}
+    for proj in projects:
+        if proj.get("server_deleted_at"):
+            mapping.pop(str(proj["id"]), None)
+        else:
+            mapping[str(proj["id"])] = proj["name"]
+    tmp = Path(mappings_path).with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(mapping, f, indent=2)
+    os.replace(tmp, mappings_path)   # LiveEntries polls this file too
+    print(f"Projects: {len(projects)} changed ({n_bytes / 1024:.1f} KB)")
+    return len(projects)
+
+
+def sync(api_token: str = TOKEN, state_path: Path = SYNC_STATE_FILE,
+         processed_dir: Path = PROCESSED_DIR, db=None) -> Dict:
+    """
+    Ask Toggl for entries changed since the stored mark and apply them by id:
+    changed entries go to a new processed CSV (older copies are removed from the
+    other CSVs), deleted entries are removed everywhere. Returns a small summary.
+    """
+    state = load_state(state_path)
+    requested_at = int(time.time())
+    default_since = requested_at - BOOTSTRAP_DAYS * 86_400
+    entries_since = state.get("entries_since", default_since)
+    projects_since = state.get("projects_since", default_since)
+
+    changed, n_bytes = _get("/me/time_entries", entries_since, api_token)
+    deleted_ids = [e["id"] for e in changed if e.get("server_deleted_at")]
+    # running timers (negative duration) come back once they are stopped
+    upserts = [e for e in changed if not e.get("server_deleted_at") and e.get("duration", 0) >= 0]
+
+    csv_path = None
+    if upserts:
+        df = process_entries(upserts)
+        stamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_path = processed_dir / f"toggl_entries_sync_{stamp}.csv"
+        write_csv(df, csv_path)
+
+    # one row per id across the processed CSVs: drop superseded and deleted rows
+    removed = remove_ids_from_csvs([e["id"] for e in upserts] + deleted_ids, processed_dir, keep=csv_path)
+
+    from entries_db import open_default_db
+    db = db or open_default_db()
+    if db:
+        if upserts:
+            db.upsert_frame(df)
+        if deleted_ids:
+            db.delete_ids(deleted_ids)
+
+    n_projects = sync_projects(projects_since, api_token)
+
+    # Only move the mark once everything above succeeded
+    state.update({
+        "entries_since":  requested_at - OVERLAP_S,
+        "projects_since": requested_at - OVERLAP_S,
+        "last_sync":      dt.datetime.now().isoformat(timespec="seconds"),
+    })
+    save_state(state, state_path)
+
+    summary = {
+        "upserted": len(upserts), "deleted": len(deleted_ids), "rows_removed": removed,
+        "projects": n_projects, "kb": round(n_bytes / 1024, 1),
+        "file": csv_path.name if csv_path else None,
+    }
+    print(f"Sync since {dt.datetime.fromtimestamp(entries_since)}: {summary}")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Download only the Toggl entries changed since the last sync")
+    parser.add_argument("--full", action="store_true", help=f"ignore the stored mark (last {BOOTSTRAP_DAYS} days)")
+    args = parser.parse_args()
+
+    if not TOKEN:
+        parser.error("TOGGL_API_KEY is not set")
+    if args.full and SYNC_STATE_FILE.exists():
+        SYNC_STATE_FILE.unlink()
+    sync()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from pathlib import Path
 from path_manager import paths
+from forest_predictor import export_forest
 
 import numpy as np
 import pandas as pd
@@ -11,6 +12,8 @@ from sklearn.metrics import roc_auc_score
 # ────────────────────────────────────────────────────────────
 DATA_DIR  = paths.data_dir / "processed"
 MODEL_OUT = paths.data_dir / "completion_model.joblib"
+COMPILED_OUT = paths.data_dir / "completion_model.npz"  # what RecommendationEngine serves from
+CV_REPORT_OUT = paths.data_dir / "completion_model_cv.json"
 
 # ── helpers ─────────────────────────────────────────────────
 def safe_predict_proba(model, X):
@@ -34,8 +37,11 @@ def balance_classes(df):
         ignore_index=True,
     )
 
-# ── main training routine ───────────────────────────────────
-def main():
+# ── data ────────────────────────────────────────────────────
+X_COLS = ["perf_score_at_start", "hour_of_day", "difficulty", "category_completion"]
+
+def build_events(n_jobs=None):
+    """Processed Toggl CSVs → TaskEvent frame (also written to task_events.csv); weeks featurised in n_jobs processes."""
     # Importing now to avoid the API requirement at import time. 
     from feature_engineering import toggl_df_to_events
     from task_manager import TaskManager
@@ -54,44 +60,202 @@ def main():
 
     if not df_list:
         print("No usable CSVs found — aborting.")
-        return
+        return None
 
     entries_df = pd.concat(df_list, ignore_index=True)
 
+    # Same cleanup as the dashboard: no running timers, overlaps resolved before episodes are inferred
+    from analytics import prepare_entries
+    from entry_validation import validate_entries, format_summary
+    result = validate_entries(prepare_entries(entries_df))
+    print(f"Validation: {format_summary(result.summary)}")
+    entries_df = result.entries
+
     # 2  Generate TaskEvents
     tm = TaskManager()
     wg = WeeklyGoalTracker()
-    events = toggl_df_to_events(entries_df, tm, wg)
+    events = toggl_df_to_events(entries_df, tm, wg, n_jobs=n_jobs)
     events.to_csv(DATA_DIR / "task_events.csv", index=False)
+    return events
+
+# ── main training routine ───────────────────────────────────
+def main(n_jobs=None):
+    events = build_events(n_jobs)
+    if events is None:
+        return
 
-    # 3  Balance classes
+    # 3  Balance classes
     events = balance_classes(events)
 
-    # 4  Temporal split 70/15/15
+    # 4  Temporal split 70/15/15
     cut_train = events["started_at"].quantile(0.70)
     cut_valid = events["started_at"].quantile(0.85)
     train_df  = events[events["started_at"] <= cut_train]
     val_df    = events[(events["started_at"] > cut_train) & (events["started_at"] <= cut_valid)]
     test_df   = events[events["started_at"] > cut_valid]
 
-    X_cols = ["perf_score_at_start", "hour_of_day", "difficulty", "category_completion"]
-    X_tr, y_tr = train_df[X_cols], train_df["completed"]
-    X_va, y_va = val_df[X_cols],   val_df["completed"]
-    X_te, y_te = test_df[X_cols],  test_df["completed"]
+    X_tr, y_tr = train_df[X_COLS], train_df["completed"]
+    X_va, y_va = val_df[X_COLS],   val_df["completed"]
+    X_te, y_te = test_df[X_COLS],  test_df["completed"]
 
-    # 5  Fit model
-    model = RandomForestClassifier(n_estimators=50, max_depth=5, random_state=42)
+    # 5  Fit model (all cores for fitting; reset before saving so single predictions stay cheap)
+    model = RandomForestClassifier(n_estimators=50, max_depth=5, random_state=42, n_jobs=-1)
     model.fit(X_tr, y_tr)
 
     print("Validation AUC:", safe_auc(y_va, safe_predict_proba(model, X_va)))
 
-    # 6  Retrain on train+val; evaluate on test
+    # 6  Retrain on train+val; evaluate on test
     model.fit(pd.concat([X_tr, X_va]), pd.concat([y_tr, y_va]))
     print("Test AUC:", safe_auc(y_te, safe_predict_proba(model, X_te)))
 
+    model.set_params(n_jobs=None)
+    joblib.dump(model, MODEL_OUT)
+    export_forest(model, COMPILED_OUT)
+    print("Model saved →", MODEL_OUT, "+", COMPILED_OUT.name)
+
+# ── time-series CV + model selection ────────────────────────
+# Small grid of tree ensembles: cheap to fit, no feature scaling needed, and
+# exportable to flat arrays by forest_predictor.
+MODEL_GRID = [
+    ("random_forest", {"n_estimators": 50,  "max_depth": 5}),
+    ("random_forest", {"n_estimators": 200, "max_depth": 5}),
+    ("random_forest", {"n_estimators": 200, "max_depth": 10, "min_samples_leaf": 3}),
+    ("extra_trees",   {"n_estimators": 200, "max_depth": 5}),
+    ("extra_trees",   {"n_estimators": 200, "max_depth": 10, "min_samples_leaf": 3}),
+]
+
+def make_model(kind, params, n_jobs=None):
+    from sklearn.ensemble import ExtraTreesClassifier
+    cls = {"random_forest": RandomForestClassifier, "extra_trees": ExtraTreesClassifier}[kind]
+    return cls(random_state=42, n_jobs=n_jobs, **params)
+
+def rolling_origin_splits(n, n_folds=5, min_train_frac=0.5):
+    """
+    Expanding-window folds over time-ordered rows: fold k trains on everything
+    before its test block, so the model never sees the future.
+    """
+    bounds = np.linspace(int(n * min_train_frac), n, n_folds + 1).astype(int)
+    return [(np.arange(0, lo), np.arange(lo, hi)) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+def balanced_index(idx, y, seed=42):
+    """balance_classes() on index arrays: down-sample the majority class."""
+    pos, neg = idx[y[idx] == 1], idx[y[idx] == 0]
+    if len(pos) == 0 or len(neg) == 0:
+        return idx
+    n = min(len(pos), len(neg))
+    rng = np.random.default_rng(seed)
+    return np.sort(np.concatenate([rng.choice(pos, n, replace=False), rng.choice(neg, n, replace=False)]))
+
+# Worker-side state: the feature matrix is opened once per process as a read-only
+# memory map, so every worker shares the same pages instead of a pickled copy per job.
+_X = _y = None
+
+def _init_worker(x_path, y_path):
+    global _X, _y
+    _X = np.load(x_path, mmap_mode="r")
+    _y = np.load(y_path, mmap_mode="r")
+
+def _fit_fold(job):
+    import time
+    cand, fold, kind, params, train_idx, test_idx = job
+    t0 = time.perf_counter()
+    train_idx = balanced_index(train_idx, _y)
+    model = make_model(kind, params)
+    model.fit(_X[train_idx], _y[train_idx])
+    fit_s = time.perf_counter() - t0
+    auc = safe_auc(_y[test_idx], safe_predict_proba(model, _X[test_idx]))
+    return {
+        "candidate": cand, "fold": fold, "auc": auc,
+        "fit_s": fit_s, "total_s": time.perf_counter() - t0,
+        "n_train": len(train_idx), "n_test": len(test_idx),
+    }
+
+def cross_validate(n_folds=5, n_jobs=None):
+    """Rolling-origin CV over MODEL_GRID in a process pool; refits and saves the best model."""
+    import os, json, time, tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    events = build_events(n_jobs)
+    if events is None:
+        return
+    events = events.sort_values("started_at").reset_index(drop=True)
+
+    X = events[X_COLS].to_numpy(dtype=np.float64)
+    y = events["completed"].astype(np.int8).to_numpy()
+    splits = rolling_origin_splits(len(events), n_folds)
+    jobs = [
+        (c, f, kind, params, train_idx, test_idx)
+        for c, (kind, params) in enumerate(MODEL_GRID)
+        for f, (train_idx, test_idx) in enumerate(splits)
+    ]
+    n_jobs = n_jobs or os.cpu_count()
+    print(f"{len(MODEL_GRID)} candidates × {len(splits)} folds on {len(events)} events, {n_jobs} workers")
+
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        x_path, y_path = os.path.join(tmp, "X.npy"), os.path.join(tmp, "y.npy")
+        np.save(x_path, X)
+        np.save(y_path, y)
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(x_path, y_path)) as pool:
+            results = list(pool.map(_fit_fold, jobs))
+    wall_s = time.perf_counter() - t0
+
+    # ── report ──
+    scores = pd.DataFrame(results)
+    for _, r in scores.sort_values(["candidate", "fold"]).iterrows():
+        kind, params = MODEL_GRID[int(r.candidate)]
+        print(f"  [{int(r.candidate)}] {kind:<14} {str(params):<55} fold {int(r.fold)}  "
+              f"AUC {r.auc:.3f}  fit {r.fit_s:.2f}s  (train {int(r.n_train)} / test {int(r.n_test)})")
+
+    summary = scores.groupby("candidate").agg(mean_auc=("auc", "mean"), std_auc=("auc", "std"),
+                                              fit_s=("fit_s", "sum"))
+    if summary["mean_auc"].isna().all():
+        print("No fold had both classes — cannot rank models, keeping the current one.")
+        return
+    best = int(summary["mean_auc"].idxmax())
+    kind, params = MODEL_GRID[best]
+    print(f"Best: [{best}] {kind} {params}  mean AUC {summary.loc[best, 'mean_auc']:.3f}  "
+          f"(CV wall time {wall_s:.1f}s, {scores['fit_s'].sum():.1f}s of fitting)")
+
+    # ── register the winner: refit on everything, save model + CV report ──
+    all_idx = balanced_index(np.arange(len(y)), y)
+    model = make_model(kind, params, n_jobs=-1)
+    model.fit(events.loc[all_idx, X_COLS], events.loc[all_idx, "completed"])
+    model.set_params(n_jobs=None)
     joblib.dump(model, MODEL_OUT)
-    print("Model saved →", MODEL_OUT)
+    export_forest(model, COMPILED_OUT)
+    print("Model saved →", MODEL_OUT, "+", COMPILED_OUT.name)
+
+    report = {
+        "trained_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "model": kind, "params": params,
+        "n_events": int(len(events)), "n_folds": len(splits),
+        "candidates": [
+            {"model": k, "params": p,
+             "mean_auc": None if pd.isna(summary.loc[c, "mean_auc"]) else float(summary.loc[c, "mean_auc"]),
+             "fold_auc": [None if pd.isna(a) else float(a)
+                          for a in scores[scores.candidate == c].sort_values("fold")["auc"]],
+             "fit_s": float(summary.loc[c, "fit_s"])}
+            for c, (k, p) in enumerate(MODEL_GRID)
+        ],
+    }
+    with open(CV_REPORT_OUT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("CV report →", CV_REPORT_OUT)
 
 # ────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the completion model")
+    parser.add_argument("--cv", action="store_true",
+                        help="rolling-origin CV + model selection over MODEL_GRID")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes for featurisation and CV (default: all cores)")
+    args = parser.parse_args()
+
+    if args.cv:
+        cross_validate(n_folds=args.folds, n_jobs=args.jobs)
+    else:
+        main(n_jobs=args.jobs)
@@ -3,17 +3,35 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List
 from path_manager import paths
-from category_mapping import CategoryMapper
+from config_store import ConfigStore, open_default_store
+from config_registry import registry
+from analytics import is_polars
 
 class WeeklyGoalTracker:
-    def __init__(self, goals_path: str = None):
-        goals_path = goals_path or paths.goals_file
-        with open(goals_path, 'r') as f:
-            self.goals_config = json.load(f)
+    def __init__(self, goals_path: str = None, store: ConfigStore = None):
+        # An explicit JSON path wins; otherwise use the SQLite store if one is configured
+        self.store = store or (None if goals_path else open_default_store())
+        
+        if goals_path:
+            with open(goals_path, 'r') as f:
+                self.goals_config = json.load(f)
+        elif store:
+            self.goals_config = store.load_goals_config()
+        else:
+            # Shared copy from the registry, reloaded when goals change on disk
+            self.goals_config = registry.get("goals")
+            registry.watch("goals", self.reload)
         self.weekly_goals = self.goals_config['weekly_goals']
+        self.version = 0   # bumped on reload; results computed from the goals can be keyed on it
         
-        # Initialize category mapper
-        self.category_mapper = CategoryMapper()
+        # Shared category mapper (parsed once per process)
+        self.category_mapper = registry.category_mapper()
+    
+    def reload(self, goals_config: Dict) -> None:
+        """Swap in a freshly loaded goals config (called by the config registry)"""
+        self.goals_config = goals_config
+        self.weekly_goals = self.goals_config['weekly_goals']
+        self.version += 1
     
     def get_current_week_range(self) -> tuple:
         """Get start and end of current week"""
@@ -27,20 +45,26 @@ class WeeklyGoalTracker:
         """Calculate progress for each weekly goal"""
         week_start, week_end = self.get_current_week_range()
         
-        # Filter data for current week
-        week_df = df[(df['date'] >= week_start) & (df['date'] <= week_end)]
-        
-        # Add category column using mapper
-        week_df.loc[:,'category'] = week_df.apply(self.category_mapper.get_category_for_row, axis=1) #.loc tells pandas unambigiously that the original dataframe will change, preventing unnecessary warnings. ':' is basically referring to all rows. 
-        # axis = 0 means go column wise and 1 go row wise. 
+        if is_polars(df):
+            # Polars backend: filtered + grouped lazily, only the per-category totals come back
+            from polars_backend import category_hours
+            totals = category_hours(df, self.category_mapper, start_date=week_start, end_date=week_end)
+            cat_hours = dict(totals.select("category", "hours").iter_rows())
+        else:
+            # Filter data for current week
+            dates = pd.to_datetime(df['date'])  # datetime64 column (entry schema); also accepts date objects
+            week_df = df[(dates >= pd.Timestamp(week_start)) & (dates <= pd.Timestamp(week_end))]
+            
+            # Add category column using mapper. assign() replaces the column, so an existing
+            # categorical 'category' doesn't reject labels it hasn't seen.
+            week_df = week_df.assign(category=week_df.apply(self.category_mapper.get_category_for_row, axis=1)) # axis = 0 means go column wise and 1 go row wise. 
+            cat_hours = {category: week_df.loc[week_df['category'] == category, 'duration_h'].sum()
+                         for category in self.weekly_goals}
         
         progress = {}
         
         for category, goal_info in self.weekly_goals.items():
-            # Filter by mapped category
-            category_df = week_df[week_df['category'] == category]
-            
-            hours_completed = category_df['duration_h'].sum() 
+            hours_completed = cat_hours.get(category, 0.0)
             
             progress[category] = {
                 'hours': {
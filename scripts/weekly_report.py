@@ -0,0 +1,294 @@
+""" Render static HTML/PNG reports (analytics + goal charts, summary tables) for a range of ISO weeks """
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import datetime as dt
+from html import escape
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from analytics import time_per_day, time_by_project, is_polars
+from path_manager import paths
+
+# ──────────────────────────────────────────────────────────────────────────────
+# The parent process aggregates every week once (daily / project / category
+# hours + goal rows); workers only get these small tables, set matplotlib up
+# once per process, and render. A week is re-rendered only when the hash of
+# its aggregated input (or REPORT_VERSION) differs from the manifest.
+REPORTS_DIR = paths.data_dir / "reports" / "weekly"
+MANIFEST_FILE = "manifest.json"
+REPORT_VERSION = 1          # bump when the page or the charts change → every week re-renders
+
+WeekKey = Tuple[int, int]   # (iso_year, iso_week)
+
+
+@dataclass
+class WeekInput:
+    """Everything one week's page is rendered from"""
+    iso_year: int
+    iso_week: int
+    week_start: str
+    entries: int
+    total_hours: float
+    daily: List[dict]       # date, hours
+    by_project: List[dict]  # project, hours
+    goals: List[dict]       # category, hours, target, percentage, priority, status
+
+    @property
+    def slug(self) -> str:
+        return f"{self.iso_year}-W{self.iso_week:02d}"
+
+    def fingerprint(self) -> str:
+        payload = json.dumps([REPORT_VERSION, asdict(self)], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _records(df: pd.DataFrame) -> List[dict]:
+    out = df.copy()
+    out["hours"] = out["hours"].astype(float).round(3)
+    return out.astype({c: str for c in out.columns if c != "hours"}).to_dict("records")
+
+
+def _goal_rows(cat_hours: pd.Series, goal_tracker) -> List[dict]:
+    goals = []
+    for category, info in goal_tracker.weekly_goals.items():
+        done, target = round(float(cat_hours.get(category, 0.0)), 2), info["target_hours"]
+        goals.append({
+            "category": category, "hours": done, "target": target,
+            "percentage": round(min(100, done / target * 100), 1) if target else 0,
+            "priority": info["priority"],
+            "status": goal_tracker.get_goal_status(done, target) if target else "",
+        })
+    for category, done in cat_hours.items():
+        if category not in goal_tracker.weekly_goals and done > 0:
+            goals.append({"category": category, "hours": round(done, 2), "target": None,
+                          "percentage": None, "priority": "", "status": "no goal set"})
+    return goals
+
+
+def aggregate_weeks(entries, goal_tracker) -> Dict[WeekKey, WeekInput]:
+    """One WeekInput per ISO week in `entries` (a pandas frame, or a Polars frame / LazyFrame)"""
+    if is_polars(entries):
+        return _aggregate_weeks_polars(entries, goal_tracker)
+    if entries.empty:
+        return {}
+    mapper = goal_tracker.category_mapper
+    pairs = entries[["project", "description"]].drop_duplicates()
+    lookup = {(p, d): mapper.map_entry_to_category(p, d) for p, d in zip(pairs["project"], pairs["description"])}
+    entries = entries.assign(category=[lookup[(p, d)] for p, d in zip(entries["project"], entries["description"])])
+
+    inputs = {}
+    for (year, week), frame in entries.groupby(["iso_year", "iso_week"], sort=True):
+        key = (int(year), int(week))
+        inputs[key] = WeekInput(
+            iso_year    = key[0],
+            iso_week    = key[1],
+            week_start  = str(frame["week_start"].min().date()),
+            entries     = int(len(frame)),
+            total_hours = round(float(frame["duration_h"].sum()), 3),
+            daily       = _records(time_per_day(frame)),
+            by_project  = _records(time_by_project(frame)),
+            goals       = _goal_rows(frame.groupby("category")["duration_h"].sum().astype(float), goal_tracker),
+        )
+    return inputs
+
+
+def _aggregate_weeks_polars(entries, goal_tracker) -> Dict[WeekKey, WeekInput]:
+    """Same WeekInputs from four grouped queries over every week at once (see polars_backend.weekly_tables)"""
+    import polars as pl
+    from polars_backend import weekly_tables
+
+    totals, daily, by_project, categories = weekly_tables(entries, goal_tracker.category_mapper)
+    week = ["iso_year", "iso_week"]
+
+    def records(table, label):
+        # _records() without the pandas round trip: label as str, hours rounded to 3
+        table = table.select(*week, pl.col(label).cast(pl.String), pl.col("hours").round(3))
+        return {key: part.drop(week).to_dicts() for key, part in table.partition_by(week, as_dict=True).items()}
+
+    daily, by_project = records(daily, "date"), records(by_project, "project")
+    cat_hours = {key: pd.Series(dict(part.select("category", "hours").iter_rows()), dtype=float)
+                 for key, part in categories.partition_by(week, as_dict=True).items()}
+
+    inputs = {}
+    for row in totals.iter_rows(named=True):
+        key = (int(row["iso_year"]), int(row["iso_week"]))
+        inputs[key] = WeekInput(
+            iso_year    = key[0],
+            iso_week    = key[1],
+            week_start  = str(row["week_start"]),
+            entries     = int(row["entries"]),
+            total_hours = round(float(row["hours"]), 3),
+            daily       = daily[key],
+            by_project  = by_project[key],
+            goals       = _goal_rows(cat_hours[key], goal_tracker),
+        )
+    return inputs
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Worker side: the week tables arrive once per worker through the initializer
+_weeks: Dict[WeekKey, WeekInput] = {}
+_out_dir: Optional[Path] = None
+
+
+def _init_worker(weeks: Dict[WeekKey, WeekInput], out_dir: Path) -> None:
+    global _weeks, _out_dir
+    import matplotlib
+    matplotlib.use("Agg")   # no GUI backend in workers
+    import plots            # noqa: F401  (seaborn theme is applied once, at import)
+    _weeks, _out_dir = weeks, out_dir
+
+
+def _table(rows: List[dict], columns: List[str]) -> str:
+    return pd.DataFrame(rows, columns=columns).to_html(index=False, na_rep="–", float_format="%.2f", border=0)
+
+
+def _render_week(key: WeekKey) -> Tuple[WeekKey, float]:
+    """Write <slug>/index.html + charts; returns (key, seconds)"""
+    from plots import bar_hours_per_day, pie_by_project, rolling_avg_line, bar_category_goals
+
+    t0 = time.perf_counter()
+    week = _weeks[key]
+    week_dir = _out_dir / week.slug
+    week_dir.mkdir(parents=True, exist_ok=True)
+
+    daily = pd.DataFrame(week.daily, columns=["date", "hours"])
+    daily["date"] = pd.to_datetime(daily["date"]).dt.date
+    by_project = pd.DataFrame(week.by_project, columns=["project", "hours"])
+    goals = pd.DataFrame(week.goals)
+
+    charts = {"daily.png": bar_hours_per_day(daily), "projects.png": pie_by_project(by_project),
+              "rolling.png": rolling_avg_line(daily)}
+    with_hours = goals[(goals["hours"] > 0) | goals["target"].notna()] if not goals.empty else goals
+    if not with_hours.empty:
+        charts["categories.png"] = bar_category_goals(with_hours.astype({"target": float}))
+    for name, buf in charts.items():
+        (week_dir / name).write_bytes(buf.getvalue())
+
+    images = "\n".join(f'<img src="{name}" alt="{name[:-4]}">' for name in charts)
+    html = f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Week {week.slug}</title>
+<style>body{{font-family:sans-serif;margin:2em}} img{{max-width:100%;display:block;margin:1em 0}}
+table{{border-collapse:collapse}} td,th{{padding:4px 10px;border-bottom:1px solid #ddd;text-align:left}}</style>
+</head><body>
+<p><a href="../index.html">← all weeks</a></p>
+<h1>ISO week {week.iso_week}, {week.iso_year}</h1>
+<p>Week of {escape(week.week_start)} · {week.total_hours:.1f} h in {week.entries} entries</p>
+{images}
+<h2>Weekly goals</h2>
+{_table(week.goals, ["category", "hours", "target", "percentage", "priority", "status"])}
+<h2>Hours by project</h2>
+{_table(week.by_project, ["project", "hours"])}
+<h2>Hours per day</h2>
+{_table(week.daily, ["date", "hours"])}
+</body></html>
+"""
+    (week_dir / "index.html").write_text(html, encoding="utf-8")
+    return key, time.perf_counter() - t0
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def load_manifest(out_dir: Path) -> Dict[str, str]:
+    try:
+        with open(out_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest: Dict[str, str], out_dir: Path) -> None:
+    tmp = out_dir / (MANIFEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, out_dir / MANIFEST_FILE)
+
+
+def write_index(out_dir: Path) -> None:
+    """Top-level page linking every rendered week, newest first"""
+    slugs = sorted((p.parent.name for p in out_dir.glob("*/index.html")), reverse=True)
+    links = "\n".join(f'<li><a href="{s}/index.html">{s}</a></li>' for s in slugs)
+    (out_dir / "index.html").write_text(
+        f'<!doctype html>\n<html><head><meta charset="utf-8"><title>Weekly reports</title></head>'
+        f'<body style="font-family:sans-serif;margin:2em">\n<h1>Weekly reports</h1>\n<ul>\n{links}\n</ul>\n</body></html>\n',
+        encoding="utf-8")
+
+
+def render_reports(inputs: Dict[WeekKey, WeekInput], out_dir: Path = REPORTS_DIR,
+                   n_jobs: Optional[int] = None, force: bool = False) -> Dict[str, int]:
+    """Render the weeks whose fingerprint changed (all of them with force); returns counts"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    fingerprints = {key: week.fingerprint() for key, week in inputs.items()}
+    todo = [
+        key for key, week in inputs.items()
+        if force or manifest.get(week.slug) != fingerprints[key] or not (out_dir / week.slug / "index.html").exists()
+    ]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if todo:
+        # only the weeks being rendered are shipped to the workers
+        shipped = {key: inputs[key] for key in todo}
+        if n_jobs == 1 or len(todo) == 1:
+            _init_worker(shipped, out_dir)
+            done = map(_render_week, todo)
+        else:
+            pool = ProcessPoolExecutor(max_workers=min(n_jobs, len(todo)),
+                                       initializer=_init_worker, initargs=(shipped, out_dir))
+            done = pool.map(_render_week, todo, chunksize=max(1, len(todo) // (4 * n_jobs)))
+        try:
+            for key, _ in done:
+                manifest[inputs[key].slug] = fingerprints[key]
+        finally:
+            if n_jobs != 1 and len(todo) > 1:
+                pool.shutdown()
+            save_manifest(manifest, out_dir)   # keep what finished even if a week failed
+
+    write_index(out_dir)
+    return {"weeks": len(inputs), "rendered": len(todo), "skipped": len(inputs) - len(todo)}
+
+
+def _iso_key(value: str) -> WeekKey:
+    """YYYY-MM-DD (the week containing it) or YYYY-Www"""
+    if "W" in value.upper():
+        year, week = value.upper().split("-W")
+        return int(year), int(week)
+    year, week, _ = dt.date.fromisoformat(value).isocalendar()
+    return year, week
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Render static weekly reports (HTML + PNG) for a range of weeks")
+    parser.add_argument("--start", type=_iso_key, help="first week: YYYY-MM-DD or YYYY-Www (default: first tracked week)")
+    parser.add_argument("--end", type=_iso_key, help="last week: YYYY-MM-DD or YYYY-Www (default: last tracked week)")
+    parser.add_argument("--out", type=Path, default=REPORTS_DIR, help="output directory")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores, 1 = in-process)")
+    parser.add_argument("--force", action="store_true", help="re-render weeks whose input did not change")
+    args = parser.parse_args(argv)
+
+    from analytics import load_entries
+    from weekly_goals import WeeklyGoalTracker
+
+    t0 = time.perf_counter()
+    inputs = aggregate_weeks(load_entries(), WeeklyGoalTracker())   # lazy scan with analytics_backend "polars"
+    inputs = {
+        key: week for key, week in inputs.items()
+        if (args.start is None or key >= args.start) and (args.end is None or key <= args.end)
+    }
+    print(f"Aggregated {len(inputs)} week(s) in {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    result = render_reports(inputs, args.out, n_jobs=args.jobs, force=args.force)
+    print(f"Rendered {result['rendered']}, skipped {result['skipped']} unchanged "
+          f"in {time.perf_counter() - t0:.2f}s → {args.out / 'index.html'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,21 +12,34 @@ sys.path.insert(0, str(project_root))
 sys.path.insert(0, str(project_root / "scripts"))
 
 # ─── third-party & local imports ──────────────────────────────────────────────
-from scripts.analytics import load_entries, total_time, time_per_day, time_by_project
 from scripts.plots     import bar_hours_per_day, pie_by_project, rolling_avg_line
 from scripts.fetch_toggl import fetch_all_entries_with_pagination
-from scripts.process      import process_file
+from scripts.process      import process_file, processed_name, list_raw_files
+from scripts.toggl_sync   import sync as sync_toggl_changes
 
 from scripts.weekly_goals       import WeeklyGoalTracker
 from scripts.task_manager       import TaskManager
-from scripts.category_mapping   import CategoryMapper
 from scripts.recommendation_engine import RecommendationEngine
-from scripts.path_manager       import paths
+from scripts.goal_simulator     import TaskDurations, simulate_week
+from scripts.live_entries       import LiveEntries
+
+# Imported without the `scripts.` prefix on purpose: the scripts import these the same
+# way, so this keeps one PathManager (.env read once) and one shared config registry.
+from path_manager    import paths
+from config_registry import registry
 
 MODEL_PATH = paths.data_dir / "completion_model.joblib"   # ← NEW
+SEARCH_ROWS = 200   # newest matches listed under the entry search; totals cover all of them
+TABS = ["📊 Analytics", "🎯 Goals & Progress", "📋 Task Manager", "🤖 Recommendations"]
+REC_DEFAULTS = {"perf_w": 0.4, "goal_w": 0.6, "target": 6.0}   # RecommendationEngine's own defaults
 
 st.set_page_config(page_title="Time Usage Dashboard", layout="wide")
 
+# Sessions share one entries frame (LiveEntries.view); Copy-on-Write makes any write a
+# private copy. Always on from pandas 3, opt-in before that.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # Check API availability. 
 HAS_TOGGL_API = bool(os.environ.get("TOGGL_API_KEY"))
 
@@ -38,19 +51,52 @@ if not HAS_TOGGL_API:
 @st.cache_resource
 def init_goal_system():
     try:
-        return WeeklyGoalTracker(), TaskManager(), CategoryMapper()
+        # All three share the registry's CategoryMapper (category_mapping.json parsed once)
+        return WeeklyGoalTracker(), TaskManager(), registry.category_mapper()
     except Exception as e:
         st.error(f"Goal system not configured: {e}")
         return None, None, None
 
-@st.cache_data
-def load():
-    return load_entries()
+@st.cache_resource
+def live_entries():
+    # One live dataset per server process. New processed files are applied to it as
+    # deltas (see LiveEntries.poll) instead of clearing a cache and re-reading everything.
+    _, task_manager, category_mapper = init_goal_system()
+    return LiveEntries(category_mapper or registry.category_mapper(), task_manager)
+
+@st.cache_resource(max_entries=2)
+def task_durations(_live, _task_manager, data_version, catalogue_version):
+    # Past episode hours per task for the goal simulator; rebuilt only when the entries
+    # (data_version) or the task catalogue change
+    return TaskDurations.from_entries(_live.df, _task_manager)
+
+def session_rec_engine(task_manager, goal_tracker):
+    """This session's engine (weights / target from the Recommendations tab settings)"""
+    if "rec_engine" not in st.session_state:
+        st.session_state.rec_engine = RecommendationEngine(task_manager, goal_tracker)
+    return st.session_state.rec_engine
+
+# Poll data/processed every `live_poll_seconds` (configs/config.json, 0 = off). Only this
+# fragment reruns on the timer; the page reruns only when this session's data is stale.
+@st.fragment(run_every=registry.get("config").get("live_poll_seconds") or None)
+def live_status():
+    live = live_entries()
+    live.poll()
+    if live.version != st.session_state.get("data_version"):
+        st.rerun()
+    held = f" · {len(live.quarantine)} held back (running / invalid / overlapping)" if len(live.quarantine) else ""
+    st.caption(f"🟢 Live · {len(live.df)} entries · data v{live.version}{held}")
 
 # ──────────────────────────────────────────────────────────────────────────────
 def main():
-    # Load your existing data
-    df = load()
+    # Pick up edits to tasks / goals / mapping files (a few stat calls per rerun)
+    registry.refresh()
+
+    # Load your existing data: one frame per data version, shared by every session.
+    # view() costs no copy; a session can't modify what the others see.
+    live = live_entries()
+    df = live.view()
+    st.session_state["data_version"] = live.version
     
     # Initialize goal system
     goal_tracker, task_manager, category_mapper = init_goal_system()
@@ -58,14 +104,14 @@ def main():
     # Every time you change a filter:
 
     # 1. Script reruns  
-    # 2. CSV data retrieved from memory cache (fast!)
-    # 3. Data gets processed again
-    # 4. Charts get regenerated
+    # 2. Live data retrieved from memory (date / week / category already derived)
+    # 3. Charts get regenerated
 
     # ----------------  GLOBAL FILTERS  -----------------
     with st.sidebar:
 
         st.header("Fetch Data")
+        live_status()
 
         # Add date input widgets
         col1, col2 = st.columns(2)
@@ -98,30 +144,45 @@ def main():
                     source_dir = Path(paths.data_dir) / "raw"
                     dest_dir = Path(paths.data_dir) / "processed"
                     
-                    source_files = list(source_dir.iterdir())
+                    source_files = list_raw_files(source_dir)
                     dest_files = list(dest_dir.iterdir())
                     dest_file_names = {f.name for f in dest_files}
                     
                     processed_count = 0
                     for path in source_files:
-                        out = path.name.replace("raw_entries", "toggl_entries").replace(".json", ".csv")
+                        out = processed_name(path)
                         
                         if out not in dest_file_names:
-                            process_file(path)
+                            process_file(path, dest_dir)
                             processed_count += 1
                     
-                    # Clear the cache to force reload of data
-                    load.clear()  # Clear only the load() function's cache
+                    # Apply only the new rows to the live dataset
+                    new_rows = live.poll()
                     
                     st.success(f"Data fetched from {date1} to {date2}")
                     if processed_count > 0:
-                        st.info(f"Processed {processed_count} new files")
+                        st.info(f"Processed {processed_count} new files ({new_rows} new entries)")
                     
-                    # Force app rerun to reload data with fresh cache
+                    # Rerun so every widget sees the updated data
                     st.rerun()
                 
                 else:
                     st.error("Start date must be before or equal to end date!")
+
+        # Only what changed in Toggl since the last sync (edits and deletions included)
+        if st.button("⚡ Sync changes"):
+            if not HAS_TOGGL_API:
+                st.sidebar.warning("API key required for syncing")
+            else:
+                with st.spinner("Syncing..."):
+                    summary = sync_toggl_changes()
+                    live.poll()
+                # shown after the rerun below (anything drawn now would be cleared by it)
+                st.session_state["sync_message"] = (f"{summary['upserted']} changed · {summary['deleted']} "
+                                                    f"deleted ({summary['kb']} KB)")
+                st.rerun()
+        if "sync_message" in st.session_state:
+            st.success(st.session_state.pop("sync_message"))
         
         
         
@@ -129,41 +190,43 @@ def main():
 
         st.header("Filters")
 
-        # make sure start is datetime
-        df['start'] = pd.to_datetime(df['start'], errors='coerce')
-        df['date']  = df['start'].dt.date          # keep the pure-date column
-
-        # Build the ISO week number once
-        df['iso_week'] = df['start'].dt.isocalendar().week
-
-        # Unique week numbers in descending order
-        weeks = sorted(df['iso_week'].unique(), reverse=True)
+        # Entries are pre-partitioned by (ISO year, ISO week) in LiveEntries, newest first.
+        # Keying on the year too keeps week 3 of 2024 and week 3 of 2025 apart.
+        weeks = live.week_keys()
 
         # ONE selector for the whole app
-        week_choice = st.selectbox("Week number", weeks, key="week_choice") # week_choice is being accessed through st.session_state.get("week_choice"), so indirectly.
+        week_choice = st.selectbox("Week", weeks, key="week_choice",
+                                   format_func=lambda k: f"{k[0]} · week {k[1]}") # week_choice is being accessed through st.session_state.get("week_choice"), so indirectly.
 
 
     
      # ---------- PAGE TABS ----------
-    
-    tab1, tab2, tab3, tab4 = st.tabs(
-        ["📊 Analytics", "🎯 Goals & Progress", "📋 Task Manager", "🤖 Recommendations"]
-    )
-
-    with tab1: show_analytics_tab(df)
-    with tab2:
-        if goal_tracker: show_goals_tab(df, goal_tracker, category_mapper)
-        else: st.warning("Goals system not configured.")
-    with tab3:
-        if task_manager: show_tasks_tab(task_manager, category_mapper)
-        else: st.warning("Task manager not configured.")
-    with tab4:
-        if goal_tracker and task_manager:
-            show_recommendations_tab(df, goal_tracker, task_manager, category_mapper)
-        else:
-            st.warning("Recommendations need goals & tasks configured.")
+    # Lazy tabs: switching tabs reruns the script and only the open tab's body runs
+    # (the others aren't built at all). Widgets that only affect their own section
+    # (entry search, task list, recommendation settings) live in st.fragment functions,
+    # so using them reruns that fragment instead of the page.
+    tab1, tab2, tab3, tab4 = st.tabs(TABS, key="active_tab", on_change="rerun")
+
+    if tab1.open:
+        with tab1: show_analytics_tab(live)
+    if tab2.open:
+        with tab2:
+            if goal_tracker: show_goals_tab(live, goal_tracker)
+            else: st.warning("Goals system not configured.")
+            if goal_tracker and task_manager:
+                show_goal_forecast(live, df, goal_tracker, task_manager)
+    if tab3.open:
+        with tab3:
+            if task_manager: show_tasks_tab(task_manager, category_mapper)
+            else: st.warning("Task manager not configured.")
+    if tab4.open:
+        with tab4:
+            if goal_tracker and task_manager:
+                show_recommendations_tab(df, goal_tracker, task_manager, category_mapper)
+            else:
+                st.warning("Recommendations need goals & tasks configured.")
 
-def show_analytics_tab(df):
+def show_analytics_tab(live):
     """ First Tab """
     st.header("📊 Time Usage Analytics")
     
@@ -173,26 +236,34 @@ def show_analytics_tab(df):
         
         # Week filter
          # Read the value that Streamlit automatically stored
-        week_num = st.session_state.get("week_choice")
+        week_key = st.session_state.get("week_choice")
     
-        if week_num is None:
+        if week_key is None:
             st.warning("Pick a week in the sidebar to see goal progress.")
             return
         
-        df_filtered  = df[df['iso_week'] == week_num]
+        # dict lookup; daily / per-project totals were computed when the week changed
+        week = live.weeks.get(tuple(week_key))
+        if week is None:
+            st.info("No entries for this week.")
+            return
 
-        
         # Project filter
-        projects = df_filtered["project"].dropna().unique()
-        proj_choice = st.multiselect("Project(s)", projects, default=projects)
-        df_filtered = df_filtered[df_filtered["project"].isin(proj_choice)]
+        proj_choice = st.multiselect("Project(s)", week.projects, default=week.projects)
+
+        # Tag filter (only when the week has tagged entries); empty = no tag filter
+        tag_index = live.tag_index()
+        tag_hours = week.tag_hours(tag_index)
+        tag_choice = st.multiselect("Tag(s)", tag_hours["tag"].tolist()) if not tag_hours.empty else []
     
+    # Precomputed when every project is selected, else a filter on this week's rows only
+    entry_ids = tag_index.entry_ids(tag_choice) if tag_choice else None
+    total, daily, proj = week.summary(proj_choice, entry_ids)
+
     # Your existing metrics
-    st.metric("Total hours this week", f"{total_time(df_filtered):.1f} h")
+    st.metric("Total hours this week", f"{total:.1f} h")
     
     # Your existing charts
-    daily = time_per_day(df_filtered)
-    proj = time_by_project(df_filtered)
     
     col1, col2 = st.columns((2, 1))
     with col1:
@@ -201,46 +272,51 @@ def show_analytics_tab(df):
         st.image(pie_by_project(proj))
     
     st.image(rolling_avg_line(daily))
-    st.caption("Use the sidebar to change week or project filters.")
 
-def show_goals_tab(df, goal_tracker, category_mapper):
+    if not tag_hours.empty:
+        st.subheader("🏷️ Hours by Tag")
+        st.bar_chart(tag_hours.set_index("tag")["hours"], width="stretch")
+    st.caption("Use the sidebar to change week, project or tag filters.")
+    entry_search(live)
+
+@st.fragment
+def entry_search(live):
+    # Full-history search through the description index (not limited to the week above);
+    # typing reruns only this fragment, not the charts above
+    st.subheader("🔎 Search Entries")
+    query = st.text_input("Description words", placeholder="e.g. refactor auth", key="entry_search")
+    if query.strip():
+        hits = live.search(query)
+        if hits.empty:
+            st.info("No entries match.")
+        else:
+            c1, c2 = st.columns(2)
+            c1.metric("Matching entries", f"{len(hits)}")
+            c2.metric("Matching hours", f"{hits['duration_h'].sum():.1f} h")
+            st.dataframe(
+                hits[["date", "project", "description", "duration_h"]].head(SEARCH_ROWS),
+                hide_index=True, width="stretch",
+            )
+
+def show_goals_tab(live, goal_tracker):
     """Tab: Weekly Goals & Progress"""
     st.header("🎯 Weekly Goals & Progress")
 
     # ----------------------------------------------------------------
-    # 1.  Prepare dataframe (date + iso_week + category columns)
-    # ----------------------------------------------------------------
-    df_week = df.copy()
-
-    # ensure date column is pure date objects
-    if df_week["date"].dtype == "object":
-        df_week["date"] = pd.to_datetime(df_week["date"]).dt.date
-
-    # iso week number (add once if it isn’t already there)
-    if "iso_week" not in df_week.columns:
-        df_week["iso_week"] = pd.to_datetime(df_week["date"]).dt.isocalendar().week
-
-    # add goal-category column
-    if "category" not in df_week.columns:
-        df_week["category"] = df_week.apply(
-            lambda row: category_mapper.map_entry_to_category(
-                project=row.get("project", ""),
-                description=row.get("description", "")
-            ),
-            axis=1
-        )
-
-    # ----------------------------------------------------------------
-    # 2.  Filter to the week the user picked in the sidebar
+    # 1.  Weekly per-category hours are kept up to date by LiveEntries
     # ----------------------------------------------------------------
-    week_num = st.session_state.get("week_choice")
-    if week_num is None:
+    week_key = st.session_state.get("week_choice")
+    if week_key is None:
         st.warning("Pick a week in the sidebar to see goal progress.")
         return
 
-    week_df = df_week[df_week["iso_week"] == week_num]
+    # ----------------------------------------------------------------
+    # 2.  Look up the week the user picked in the sidebar
+    # ----------------------------------------------------------------
+    iso_year, week_num = week_key
+    cat_hours = live.category_hours_for_week(week_num, iso_year)
 
-    if week_df.empty:
+    if cat_hours.empty:
         st.info(f"No data found for ISO-week {week_num}.")
         return
 
@@ -249,7 +325,7 @@ def show_goals_tab(df, goal_tracker, category_mapper):
     # ----------------------------------------------------------------
     progress = {}
     for category, goal_info in goal_tracker.weekly_goals.items():
-        hours_done = week_df[week_df["category"] == category]["duration_h"].sum()
+        hours_done = cat_hours.get(category, 0.0)
         target     = goal_info["target_hours"]
         pct        = min(100, (hours_done / target) * 100) if target else 0
 
@@ -288,16 +364,12 @@ def show_goals_tab(df, goal_tracker, category_mapper):
     # 5.  Category-distribution chart + text summary
     # ----------------------------------------------------------------
     st.subheader("📊 Category Time Distribution")
-    cat_hours = (
-        week_df.groupby("category")["duration_h"]
-               .sum()
-               .sort_values(ascending=False)
-    )
+    cat_hours = cat_hours[cat_hours > 0].sort_values(ascending=False)
 
     if cat_hours.empty:
         st.info("No tracked hours this week.")
     else:
-        st.bar_chart(cat_hours, use_container_width=True)
+        st.bar_chart(cat_hours, width="stretch")
 
         for cat, hrs in cat_hours.items():
             targ = goal_tracker.weekly_goals.get(cat, {}).get("target_hours", 0)
@@ -307,8 +379,9 @@ def show_goals_tab(df, goal_tracker, category_mapper):
             else:
                 st.write(f"• **{cat}**  {hrs:.1f} h (no goal set)")
 
+@st.fragment
 def show_tasks_tab(task_manager,category_mapper):
-    """Tab 3"""
+    """Tab 3 (a fragment: adding / removing a task reruns only this tab)"""
     st.header("📋 Task Manager")
     
     col1, col2 = st.columns([2, 1])
@@ -334,7 +407,7 @@ def show_tasks_tab(task_manager,category_mapper):
                     if st.button(f"🗑️ Remove {task_name}", key=f"del_{task_name}"):
                         task_manager.remove_task(task_name)
                         task_manager.save_tasks()
-                        st.rerun()
+                        st.rerun(scope="fragment")
         else:
             st.info("No tasks configured. Add some below!")
     
@@ -352,19 +425,52 @@ def show_tasks_tab(task_manager,category_mapper):
                     task_manager.add_task(task_name, task_category, task_difficulty, task_duration)
                     task_manager.save_tasks()
                     st.success(f"Added: {task_name}")
-                    st.rerun()
+                    st.rerun(scope="fragment")
+
+def recommendation_settings(rec_engine):
+    """Weights / daily target (used by the Recommendations tab and the goal forecast)"""
+    # Kept outside the widgets' own state: Streamlit drops that while the tab is closed
+    saved = st.session_state.setdefault("rec_settings", dict(REC_DEFAULTS))
+    with st.expander("🎛️ Recommendation Settings"):
+        col1, col2, col3 = st.columns(3)
+        saved["perf_w"] = col1.slider("Performance Weight", 0.0, 1.0, saved["perf_w"], 0.1, key="rec_perf_w")
+        saved["goal_w"] = col2.slider("Goal Progress Weight", 0.0, 1.0, saved["goal_w"], 0.1, key="rec_goal_w")
+        saved["target"] = col3.number_input("Daily Target Hours", 1.0, 12.0, saved["target"], 0.5, key="rec_target")
+    rec_engine.update_weights(saved["perf_w"], saved["goal_w"])
+    rec_engine.set_daily_target(saved["target"])
+
+def show_goal_forecast(live, df, goal_tracker, task_manager):
+    """Goals tab: Monte Carlo odds of reaching each goal this week, following the recommendations"""
+    st.subheader("🎲 Goal Forecast (this week)")
+    rec_engine = session_rec_engine(task_manager, goal_tracker)
+    durations = task_durations(live, task_manager, live.version, task_manager.version)
+    forecast = simulate_week(rec_engine, df, durations)
+
+    cols = st.columns(max(1, len(forecast.table)))
+    for idx, row in enumerate(forecast.table.itertuples()):
+        with cols[idx]:
+            st.metric(label=f"{row.category}", value=f"{row.p_hit:.0%}",
+                      delta=f"~{row.median:.1f} h of {row.target:g} h", delta_color="off")
+    st.caption(f"P(all goals) {forecast.p_all:.0%} · {forecast.n_sims} simulated weeks over the "
+               f"{forecast.days} day(s) left, {rec_engine.daily_target_hours:g} h/day on the top "
+               f"recommendation · {forecast.ms:.0f} ms")
+    st.dataframe(
+        forecast.table.rename(columns={"category": "Category", "done": "Done (h)", "target": "Target (h)",
+                                       "p_hit": "P(reached)", "p10": "P10 (h)", "median": "Median (h)",
+                                       "p90": "P90 (h)"}).round(2),
+        hide_index=True, width="stretch",
+    )
 
 def human_time(epoch: float) -> str:
     return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M")
 
+@st.fragment
 def show_recommendations_tab(df, goal_tracker, task_manager, category_mapper):
-    """Tab 4 — now includes model status & retrain button"""
+    """Tab 4 — model status, retrain button and settings; a fragment, so a settings change reruns only this tab"""
     st.header("🤖 Task Recommendations")
 
     # 1️⃣  load / cache engine
-    if "rec_engine" not in st.session_state:
-        st.session_state.rec_engine = RecommendationEngine(task_manager, goal_tracker)
-    rec_engine = st.session_state.rec_engine
+    rec_engine = session_rec_engine(task_manager, goal_tracker)
 
     # 2️⃣  model status + retrain button
     model_exists = MODEL_PATH.exists()
@@ -377,28 +483,16 @@ def show_recommendations_tab(df, goal_tracker, task_manager, category_mapper):
         st.success("Retrain finished — reloading model")
         # refresh engine so new .joblib is picked up
         st.session_state.rec_engine = RecommendationEngine(task_manager, goal_tracker)
-        st.rerun()
+        st.rerun(scope="fragment")
 
-    # 3️⃣  sidebar settings specific to this tab
-    with st.sidebar:
-        st.subheader("🎛️ Recommendation Settings")
-        perf_w = st.slider("Performance Weight", 0.0, 1.0, 0.4, 0.1)
-        goal_w = st.slider("Goal Progress Weight", 0.0, 1.0, 0.6, 0.1)
-        rec_engine.update_weights(perf_w, goal_w)
-        target  = st.number_input("Daily Target Hours", 1.0, 12.0, 6.0, 0.5)
-        rec_engine.set_daily_target(target)
-
-    # 4️⃣  add categories to dataframe
-    df_cat = df.copy()
-    df_cat["category"] = df_cat.apply(
-        lambda r: category_mapper.map_entry_to_category(
-            project=r.get("project", ""), description=r.get("description", "")
-        ),
-        axis=1,
-    )
+    # 3️⃣  settings (the goal forecast reads them from the session engine too)
+    recommendation_settings(rec_engine)
+    target = rec_engine.daily_target_hours
 
-    # 5️⃣  get & display recommendations
-    recs = rec_engine.get_top_recommendations(df_cat, limit=5)
+    # 4️⃣  get & display recommendations (categories are already on the live dataframe).
+    # Cached per data version / catalogue / goals / weights / target / model / hour.
+    data_version = st.session_state.get("data_version")
+    recs = rec_engine.get_top_recommendations(df, limit=5, data_version=data_version)
     if not recs:
         st.warning("No tasks to recommend. Add tasks in the Task Manager tab.")
         return
@@ -423,6 +517,31 @@ def show_recommendations_tab(df, goal_tracker, task_manager, category_mapper):
             st.write(f"**Duration:** {rec.estimated_duration} h")
             st.write(f"**Reasoning:** {rec.reasoning}")
 
+    # 5️⃣  plan for the rest of today (packs tasks into the remaining daily target)
+    st.subheader("🗓️ Today's Plan")
+    plan = rec_engine.generate_daily_plan(df, data_version=data_version)
+    if not plan.tasks:
+        if plan.capacity_hours <= 0:
+            st.info(f"Nothing to plan — today's {target:.1f} h target is already reached.")
+        elif not any(r.priority_score > 0 for r in recs):
+            st.info(f"Nothing to plan — no task scores above 0 for the {plan.capacity_hours:.2f} h left today.")
+        else:
+            st.info(f"Nothing to plan — no task fits in the {plan.capacity_hours:.2f} h left today.")
+        return
+
+    st.caption(f"{plan.total_hours:.2f} h of {plan.capacity_hours:.2f} h remaining today · "
+               f"total score {plan.total_score:.2f} · {plan.method} solver, {plan.solve_ms:.0f} ms")
+    planned = {r.task_name: r for r in plan.tasks}
+    st.table(pd.DataFrame([
+        {
+            "Task": name,
+            "Times": count,
+            "Hours": planned[name].estimated_duration * count,
+            "Category": planned[name].category,
+        }
+        for name, count in plan.counts.items()
+    ]))
+
 # ──────────────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     main()